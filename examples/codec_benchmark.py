@@ -0,0 +1,68 @@
+"""Encode and decode cost of the relay codecs.
+
+Compares the default pickle codec with a `StructCodec` for a small
+configuration message, like the ones a frontend sends when a dial moves,
+and for messages carrying arrays of increasing size. Times cover the
+codec and the framing done by the relay, not the socket.
+
+Run with ``python examples/codec_benchmark.py``.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from ezmsg.vispy.frontends.codecs import PickleCodec
+from ezmsg.vispy.frontends.codecs import StructCodec
+
+REPEAT = 0.5  # Seconds spent on each measurement.
+
+
+@dataclass
+class ConfigMessage:
+    waveform_type: str
+    frequency: float
+    start: bool
+
+
+@dataclass
+class ArrayMessage:
+    data: np.ndarray
+    fs: float
+    channel: int
+
+
+def per_call(func, *args) -> float:
+    """Average time of ``func(*args)`` in microseconds."""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < REPEAT:
+        for _ in range(100):
+            func(*args)
+        count += 100
+    return 1e6 * (time.perf_counter() - start) / count
+
+
+def decode_view(codec, segments: list):
+    # The receiver decodes memoryviews of the received frame.
+    return codec.decode([memoryview(segment) for segment in segments])
+
+
+def compare(label: str, msg):
+    codecs = [("pickle", PickleCodec()), ("struct", StructCodec(type(msg)))]
+    for name, codec in codecs:
+        segments = codec.encode(msg)
+        size = sum(memoryview(segment).nbytes for segment in segments)
+        encode = per_call(codec.encode, msg)
+        decode = per_call(decode_view, codec, segments)
+        print(f"{label:>16} {name:>7} {size:>12} {encode:>11.2f} {decode:>11.2f}")
+
+
+if __name__ == "__main__":
+    header = ["message", "codec", "bytes", "encode us", "decode us"]
+    print("{:>16} {:>7} {:>12} {:>11} {:>11}".format(*header))
+    compare("config", ConfigMessage("sine", 10.0, True))
+    for samples in [16, 1024, 2**20]:
+        data = np.random.randn(samples, 32).astype(np.float32)
+        compare(f"array {samples}x32", ArrayMessage(data, 1000.0, 3))
@@ -0,0 +1,112 @@
+"""Throughput of the backend command reader under bursty command traffic.
+
+A writer thread sends bursts of small commands, like a dragged slider
+would, with a large array command every few bursts. The main thread reads
+them the way `Application.on_command` does, with a `FrameStreamReader`
+that splits every queued command out of a single read. For comparison,
+the same traffic is read one frame at a time with two ``readexactly``
+calls per command.
+
+Run with ``python examples/command_benchmark.py``.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from ezmsg.vispy.frontends.relay import decode_frame
+from ezmsg.vispy.frontends.relay import encode_frame
+from ezmsg.vispy.frontends.relay import FrameStreamReader
+from ezmsg.vispy.helpers.constants import BYTEORDER
+from ezmsg.vispy.helpers.constants import UINT64_SIZE
+
+BURSTS = 200
+BURST_SIZE = [1, 10, 100, 1000]
+# A large command is sent after every LARGE_EVERY bursts.
+LARGE_EVERY = 20
+LARGE_SIZE = 16 * 2**20
+
+
+@dataclass
+class SliderCommand:
+    value: float
+    name: str
+
+
+def traffic(burst_size: int) -> tuple:
+    """Encoded bursts of commands, and the number of commands."""
+    bursts = []
+    count = 0
+    large = np.zeros(LARGE_SIZE // 8)
+    for index in range(BURSTS):
+        commands = [SliderCommand(float(value), "dial") for value in range(burst_size)]
+        if index % LARGE_EVERY == 0:
+            commands.append(large)
+        count += len(commands)
+        bursts.append(b"".join(b"".join(encode_frame(cmd)) for cmd in commands))
+    return bursts, count
+
+
+def send_bursts(sock: socket.socket, bursts: list):
+    for burst in bursts:
+        sock.sendall(burst)
+        time.sleep(0.0005)
+    sock.shutdown(socket.SHUT_WR)
+
+
+async def read_batches(reader: asyncio.StreamReader) -> tuple:
+    frames = FrameStreamReader(reader)
+    count = 0
+    wakeups = 0
+    while True:
+        batch = await frames.read_batch()
+        if not batch:
+            return count, wakeups
+        wakeups += 1
+        count += len([decode_frame(raw) for raw in batch])
+
+
+async def read_exactly(reader: asyncio.StreamReader) -> tuple:
+    count = 0
+    while True:
+        try:
+            raw_size = await reader.readexactly(UINT64_SIZE)
+            size = int.from_bytes(raw_size, byteorder=BYTEORDER, signed=False)
+            decode_frame(await reader.readexactly(size))
+        except asyncio.IncompleteReadError:
+            return count, count
+        count += 1
+
+
+async def measure(read, bursts: list) -> tuple:
+    writer_sock, reader_sock = socket.socketpair()
+    reader, writer = await asyncio.open_connection(sock=reader_sock)
+    sender = threading.Thread(target=send_bursts, args=(writer_sock, bursts))
+    start = time.perf_counter()
+    sender.start()
+    count, wakeups = await read(reader)
+    elapsed = time.perf_counter() - start
+    sender.join()
+    writer.close()
+    writer_sock.close()
+    return count / elapsed, count / max(wakeups, 1)
+
+
+async def main():
+    print(
+        f"{'burst':>6} {'batched cmd/s':>14} {'cmd/wakeup':>11} "
+        f"{'readexactly cmd/s':>18}"
+    )
+    for burst_size in BURST_SIZE:
+        bursts, count = traffic(burst_size)
+        batched, per_wakeup = await measure(read_batches, bursts)
+        exact, _ = await measure(read_exactly, bursts)
+        print(f"{burst_size:>6} {batched:>14.0f} {per_wakeup:>11.1f} {exact:>18.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,13 +5,17 @@ from qtpy import QtGui
 from qtpy import QtWidgets
 from qtpy.uic import loadUi
 
+from ezmsg.vispy.frontends.codecs import register_codec
 from ezmsg.vispy.frontends.main_window import EzMainWindow
+from ezmsg.vispy.frontends.main_window import RateLimit
 from ezmsg.vispy.frontends.main_window import register_command
 from ezmsg.vispy.frontends.main_window import register_response
 
 logger = logging.getLogger(__name__)
 
 
+# Sent on every dial move, so skip the overhead of pickle.
+@register_codec
 @dataclass
 class WaveformCfgMessage:
     waveform_type: str
@@ -42,7 +46,8 @@ class LineVisFrontend(EzMainWindow):
         self.ez_start_btn.clicked.connect(self.on_start_btn)
         self.ez_start_btn.clicked.connect(self.preprocess_waveform_cfg)
 
-    @register_command
+    # Dragging the dial changes its value hundreds of times per second.
+    @register_command(policy=RateLimit(20))
     def preprocess_waveform_cfg(self):
         frequency = self.ez_frequency_dial.value()
         waveform_type = self.ez_waveform_type.currentText()
@@ -63,8 +63,8 @@ class ImageApp(ez.Collection):
         )
 
         # Configure application
-        # By enabling external_timer we ensure that the plots are updated
-        # in sync
+        # By enabling external_timer, all plots are updated in the same frames,
+        # at most once every external_timer_interval ms
         self.APP.apply_settings(
             SimpleApplicationSettings(
                 title="A moderately cool application",
@@ -0,0 +1,85 @@
+"""Throughput of the frontend response socket, for 1 KB to 100 MB payloads.
+
+A writer thread sends length-prefixed frames over a socket pair, like
+`Application.on_response`, while the main thread reads them the way
+`EzMainWindow._on_response` does: waiting for the socket to become
+readable, then reading what is available without blocking.
+
+The legacy reader, which grew an immutable bytes object 4 KB at a time,
+is measured on the smaller payloads for comparison; it is quadratic in the
+payload size, so it is skipped above ``LEGACY_MAX``.
+
+Run with ``python examples/relay_benchmark.py``.
+"""
+
+import select
+import socket
+import threading
+import time
+
+from ezmsg.vispy.frontends.relay import FrameDecoder
+from ezmsg.vispy.helpers.constants import BYTEORDER
+from ezmsg.vispy.helpers.constants import UINT64_SIZE
+
+SIZES = [2**10, 2**14, 2**17, 2**20, 2**23, 2**26, 100 * 2**20]
+TOTAL = 256 * 2**20
+LEGACY_MAX = 2**20
+LEGACY_TOTAL = 16 * 2**20
+
+
+def send_frames(sock: socket.socket, payload: bytes, count: int):
+    header = len(payload).to_bytes(UINT64_SIZE, byteorder=BYTEORDER, signed=False)
+    for _ in range(count):
+        sock.sendall(header)
+        sock.sendall(payload)
+
+
+def read_decoder(sock: socket.socket, count: int):
+    sock.setblocking(False)
+    decoder = FrameDecoder()
+    received = 0
+    while received < count:
+        select.select([sock], [], [])
+        received += len(decoder.read_from(sock))
+
+
+def read_legacy(sock: socket.socket, count: int):
+    sock.setblocking(True)
+    received = 0
+    while received < count:
+        select.select([sock], [], [])
+        raw_size_bytes = sock.recv(UINT64_SIZE)
+        raw_size = int.from_bytes(raw_size_bytes, byteorder=BYTEORDER, signed=False)
+        raw = b""
+        while len(raw) < raw_size:
+            bytes_to_read = min(raw_size - len(raw), 4096)
+            raw += sock.recv(bytes_to_read)
+        received += 1
+
+
+def measure(reader, size: int, total: int = TOTAL) -> float:
+    """Throughput of ``reader`` in MB/s, reading about ``total`` bytes."""
+    count = max(1, total // size)
+    payload = bytes(size)
+    writer_sock, reader_sock = socket.socketpair()
+    writer = threading.Thread(target=send_frames, args=(writer_sock, payload, count))
+    start = time.perf_counter()
+    writer.start()
+    reader(reader_sock, count)
+    elapsed = time.perf_counter() - start
+    writer.join()
+    writer_sock.close()
+    reader_sock.close()
+    return count * size / elapsed / 2**20
+
+
+if __name__ == "__main__":
+    print(f"{'payload':>10} {'decoder MB/s':>14} {'legacy MB/s':>14}")
+    for size in SIZES:
+        decoder = measure(read_decoder, size)
+        legacy = (
+            measure(read_legacy, size, LEGACY_TOTAL)
+            if size <= LEGACY_MAX
+            else float("nan")
+        )
+        print(f"{size / 2**10:>8.0f}KB {decoder:>14.1f} {legacy:>14.1f}")
@@ -0,0 +1,189 @@
+import dataclasses
+import pickle
+import struct
+import typing
+import zlib
+from typing import Any
+from typing import Optional
+
+import numpy as np
+
+# Codec id of the messages without a registered codec.
+PICKLE_CODEC_ID = 0
+
+
+class Codec:
+    """Turns messages into segments of a relay frame, and back.
+
+    The first segment holds the encoded message, the others hold raw
+    buffers, e.g. array data, that are written to the socket without being
+    copied. Segments are decoded from memoryviews of the received frame.
+    """
+
+    def encode(self, msg: Any) -> list:
+        raise NotImplementedError
+
+    def decode(self, segments: list) -> Any:
+        raise NotImplementedError
+
+
+class PickleCodec(Codec):
+    """Pickle protocol 5, with the buffers of arrays kept out of band."""
+
+    def encode(self, msg: Any) -> list:
+        oob = []
+        stream = pickle.dumps(msg, protocol=5, buffer_callback=oob.append)
+        return [stream] + [buffer.raw() for buffer in oob]
+
+    def decode(self, segments: list) -> Any:
+        return pickle.loads(segments[0], buffers=segments[1:])
+
+
+_SCALAR = 0
+_STR = 1
+_BYTES = 2
+_ARRAY = 3
+
+# Struct codes of the fields of each kind; arrays store their dtype and ndim.
+_CODES = {bool: "?", int: "q", float: "d", str: "I", bytes: "I", np.ndarray: "8sB"}
+
+
+class StructCodec(Codec):
+    """Compact codec for dataclasses of scalars, strings and arrays.
+
+    Fields may be annotated as bool, int, float, str, bytes or
+    `np.ndarray`. Scalars, the sizes of strings and the dtype and number of dimensions
+    of arrays are packed with a struct compiled once per message type,
+    followed by the strings and array shapes. Array data goes out of band.
+    This skips the per-object work of pickle, which dominates for small
+    messages such as configurations.
+
+    Parameters
+    ----------
+    msg_type : type
+        The dataclass to encode. All its fields must be init fields.
+    """
+
+    def __init__(self, msg_type: type):
+        if not dataclasses.is_dataclass(msg_type):
+            raise TypeError(f"{msg_type.__name__} is not a dataclass")
+        hints = typing.get_type_hints(msg_type)
+        self._type = msg_type
+        self._fields = []
+        codes = "<"
+        for field in dataclasses.fields(msg_type):
+            hint = hints[field.name]
+            if not field.init or hint not in _CODES:
+                raise TypeError(
+                    f"{msg_type.__name__}.{field.name}: {hint} is not supported"
+                )
+            if hint is str:
+                kind = _STR
+            elif hint is bytes:
+                kind = _BYTES
+            elif hint is np.ndarray:
+                kind = _ARRAY
+            else:
+                kind = _SCALAR
+            self._fields.append((field.name, kind))
+            codes += _CODES[hint]
+        self._struct = struct.Struct(codes)
+
+    def encode(self, msg: Any) -> list:
+        values = []
+        tail = []
+        arrays = []
+        for name, kind in self._fields:
+            value = getattr(msg, name)
+            if kind == _SCALAR:
+                values.append(value)
+            elif kind == _ARRAY:
+                array = np.ascontiguousarray(value)
+                if array.dtype.hasobject or array.dtype.names is not None:
+                    raise TypeError(
+                        f"{name}: arrays of {array.dtype} are not supported"
+                    )
+                values.append(array.dtype.str.encode())
+                values.append(array.ndim)
+                tail.append(np.asarray(array.shape, dtype="<u8").tobytes())
+                arrays.append(array.reshape(-1).view(np.uint8))
+            else:
+                raw = value.encode() if kind == _STR else bytes(value)
+                values.append(len(raw))
+                tail.append(raw)
+        return [self._struct.pack(*values) + b"".join(tail)] + arrays
+
+    def decode(self, segments: list) -> Any:
+        head = segments[0]
+        values = iter(self._struct.unpack_from(head))
+        arrays = iter(segments[1:])
+        offset = self._struct.size
+        kwargs = {}
+        for name, kind in self._fields:
+            if kind == _SCALAR:
+                kwargs[name] = next(values)
+            elif kind == _ARRAY:
+                dtype = next(values).rstrip(b"\0").decode()
+                ndim = next(values)
+                shape = np.frombuffer(head, dtype="<u8", count=ndim, offset=offset)
+                offset += 8 * ndim
+                kwargs[name] = np.frombuffer(next(arrays), dtype=dtype).reshape(shape)
+            else:
+                size = next(values)
+                raw = bytes(head[offset : offset + size])
+                offset += size
+                kwargs[name] = raw.decode() if kind == _STR else raw
+        return self._type(**kwargs)
+
+
+_PICKLE = PickleCodec()
+_codecs: dict[int, Codec] = {PICKLE_CODEC_ID: _PICKLE}
+_type_codecs: dict[type, tuple[int, Codec]] = {}
+
+
+def type_codec_id(msg_type: type) -> int:
+    """Codec id of a message type, the same in every process."""
+    name = f"{msg_type.__module__}.{msg_type.__qualname__}"
+    return zlib.crc32(name.encode()) + 1
+
+
+def register_codec(msg_type: type, codec: Optional[Codec] = None) -> type:
+    """Encode the messages of ``msg_type`` with ``codec`` on the relay.
+
+    Every frame carries the id of the codec its message was encoded with,
+    and the receiver decodes it with the codec registered under that id.
+    The id is derived from the name of the message type, so the frontend
+    and the ezmsg side agree on it as long as both register the type.
+    Messages of other types are pickled.
+
+    Can be used as a class decorator, registering a `StructCodec`.
+
+    Parameters
+    ----------
+    msg_type : type
+        The message type.
+    codec : Codec, optional
+        Defaults to a `StructCodec` of ``msg_type``.
+    """
+    if codec is None:
+        codec = StructCodec(msg_type)
+    codec_id = type_codec_id(msg_type)
+    registered = _type_codecs.get(msg_type)
+    if codec_id in _codecs and (registered is None or registered[0] != codec_id):
+        raise ValueError(f"Codec id of {msg_type.__name__} is already used")
+    _codecs[codec_id] = codec
+    _type_codecs[msg_type] = (codec_id, codec)
+    return msg_type
+
+
+def codec_for(msg_type: type) -> tuple[int, Codec]:
+    """Id and codec used to encode messages of ``msg_type``."""
+    return _type_codecs.get(msg_type, (PICKLE_CODEC_ID, _PICKLE))
+
+
+def codec_by_id(codec_id: int) -> Codec:
+    """Codec that decodes frames carrying ``codec_id``."""
+    try:
+        return _codecs[codec_id]
+    except KeyError:
+        raise KeyError(f"No codec registered with id {codec_id}") from None
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import signal
+import socket
+from dataclasses import dataclass
+from dataclasses import field
+
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+import ezmsg.core as ez
+
+from ..helpers.frame_scheduler import FrameScheduler
+from ..helpers.shared_ring import SharedFrameRing
+from ..units.plot_vis import PlotMetricsMessage
+from .main_window import _QtFrameWriter
+from .main_window import EzWindowMeta
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RemoteVisual:
+    """What the GUI process needs to rebuild a visual."""
+
+    unit_type: type
+    settings: ez.Settings
+    ring_name: str
+    # Receives a byte per message written to the ring, and sends back the
+    # display demands and metrics of the plot as relay frames.
+    link: socket.socket
+
+
+@dataclass
+class GuiProcessSpec:
+    window: EzWindowMeta
+    command_socket: socket.socket
+    response_socket: socket.socket
+    width: int
+    height: int
+    # Minimum time between two frames, in ms.
+    interval: int
+    kwargs: dict = field(default_factory=dict)
+    visuals: dict[str, RemoteVisual] = field(default_factory=dict)
+
+
+def _run_subscriber(coro) -> None:
+    """Run a subscriber coroutine that never awaits, without an event loop."""
+    try:
+        coro.send(None)
+    except StopIteration:
+        return
+    coro.close()
+    raise RuntimeError("Subscribers of visuals must not await in a GUI process")
+
+
+class _VisualFeed(QtCore.QObject):
+    """Hands the messages of a ring to the copy of a visual in this process.
+
+    Every frame reads copies of the new messages and releases their
+    memory in the ring, then runs the subscriber of the visual on them and
+    updates it. The visual may keep the arrays as long as it needs.
+
+    The metrics of the visual are measured here, so they are sent back
+    every ``metrics_interval`` for the unit in the ezmsg process to
+    publish.
+    """
+
+    def __init__(
+        self,
+        unit: ez.Unit,
+        ring: SharedFrameRing,
+        link: socket.socket,
+        scheduler: FrameScheduler,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._unit = unit
+        self._ring = ring
+        self._link = link
+        self._link.setblocking(False)
+        self._scheduler = scheduler
+        self._notifier = QtCore.QSocketNotifier(
+            self._link.fileno(), QtCore.QSocketNotifier.Type.Read, self
+        )
+        self._notifier.activated.connect(self._on_wake)
+        self._writer = _QtFrameWriter(self._link, self)
+        # Connected after the unit, which updates its state first.
+        widget = self._unit.STATE.widget
+        widget.visibility_change_ev.connect(self._on_visibility)
+        widget.display_demand_ev.connect(self._send_demand)
+        self._metrics_timer = None
+        interval = self._unit.SETTINGS.metrics_interval
+        if interval > 0:
+            self._metrics_timer = QtCore.QTimer(self)
+            self._metrics_timer.timeout.connect(self._send_metrics)
+            self._metrics_timer.start(int(interval * 1000))
+
+    def _on_wake(self):
+        try:
+            while True:
+                if not self._link.recv(4096):
+                    # The ezmsg process closed the link.
+                    self._notifier.setEnabled(False)
+                    break
+        except (BlockingIOError, OSError):
+            pass
+        self._scheduler.mark_dirty(self.frame)
+
+    def _send_demand(self, *args):
+        self._writer.send(self._unit.display_demand())
+
+    def _send_metrics(self):
+        state = self._unit.STATE
+        values = state.metrics.report(
+            state.swap.producer_contention,
+            getattr(state.widget, "total_upload_bytes", 0),
+        )
+        self._writer.send(PlotMetricsMessage(**values))
+
+    def _on_visibility(self, visible: bool):
+        self._send_demand()
+        if visible:
+            # Catch up with the data received while hidden.
+            self._scheduler.mark_dirty(self.frame)
+
+    def frame(self):
+        messages = self._ring.read()
+        self._ring.release()
+        for message in messages:
+            _run_subscriber(self._unit.got_message(message))
+        self._unit.frame()
+
+    def close(self):
+        if self._metrics_timer is not None:
+            self._metrics_timer.stop()
+        self._notifier.setEnabled(False)
+        self._writer.close()
+        self._ring.release()
+        self._ring.close()
+        self._link.close()
+
+
+def run_gui_process(spec: GuiProcessSpec) -> None:
+    """Run the window and visuals of an `Application` in this process.
+
+    Each visual is a copy of the ezmsg unit, built from its type and
+    settings. The units in the ezmsg process forward their messages
+    through shared memory rings, and this process runs their subscribers
+    and updates, so rendering never holds the GIL of the ezmsg process.
+    """
+    signal.signal(signal.SIGINT, lambda sig, frame: QtWidgets.QApplication.quit())
+    app = QtWidgets.QApplication([])
+    scheduler = FrameScheduler.instance()
+    scheduler.interval = spec.interval
+
+    win = spec.window(
+        command_socket=spec.command_socket,
+        response_socket=spec.response_socket,
+        **spec.kwargs,
+    )
+    win.resize(spec.width, spec.height)
+
+    widgets = {}
+    feeds = []
+    for name, remote in spec.visuals.items():
+        unit = remote.unit_type(remote.settings)
+        asyncio.run(unit.setup())
+        widgets[name] = unit.build()
+        # The feed schedules the updates, once it has read the ring.
+        unit.STATE.scheduler = None
+        ring = SharedFrameRing(name=remote.ring_name)
+        feeds.append(_VisualFeed(unit, ring, remote.link, scheduler))
+    win.add_visual_widgets(widgets)
+
+    win.show()
+    app.exec()
+
+    for feed in feeds:
+        feed.close()
+    scheduler.close()
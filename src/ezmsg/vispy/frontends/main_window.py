@@ -1,7 +1,10 @@
+import functools
 import logging
-import pickle
-import select
+import socket
+from dataclasses import dataclass
+from typing import Any
 from typing import Callable
+from typing import Optional
 from typing import Union
 
 import qdarkstyle
@@ -10,8 +13,10 @@ from qdarkstyle.light.palette import LightPalette
 from qtpy import QtCore
 from qtpy import QtWidgets
 
-from ..helpers.constants import BYTEORDER
-from ..helpers.constants import UINT64_SIZE
+from .relay import decode_frame
+from .relay import FrameDecoder
+from .relay import FrameWriter
+from .relay import InProcessRelay
 
 # Silence logging for qdarkstyle package.
 logging.getLogger("qdarkstyle").setLevel(logging.WARNING)
@@ -38,12 +43,128 @@ def merge(a, b, path=None):
     return a
 
 
-def register_command(func) -> Callable:
-    def wrapper(self):
-        res = func(self)
-        self.command_signal.emit(res)
+@dataclass(frozen=True)
+class LatestWins:
+    """Coalescing policy: send the last command of a burst.
 
-    return wrapper
+    The first command of a message type starts a window of ``interval`` ms.
+    Commands of that type within the window replace each other, and the
+    last one is sent when it ends.
+    """
+
+    interval: int
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Coalescing policy: send at most ``rate`` commands per second.
+
+    The limit applies per message type. A command is sent immediately if
+    the previous one of its type is old enough, otherwise the latest
+    waiting command is sent as soon as the limit allows.
+    """
+
+    rate: float
+
+
+class _CommandThrottle:
+    """Holds back the commands of one message type according to a policy."""
+
+    def __init__(
+        self,
+        policy: Union[LatestWins, RateLimit],
+        send: Callable[[Any], None],
+        parent: Optional[QtCore.QObject] = None,
+    ):
+        if isinstance(policy, RateLimit):
+            self._interval = int(round(1000 / policy.rate))
+            self._leading = True
+        else:
+            self._interval = int(policy.interval)
+            self._leading = False
+        self._send = send
+        self._pending = None
+        self._has_pending = False
+        self._timer = QtCore.QTimer(parent)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def submit(self, msg: Any):
+        if self._leading and not self._timer.isActive():
+            self._send(msg)
+            self._timer.start(self._interval)
+            return
+        self._pending = msg
+        self._has_pending = True
+        if not self._timer.isActive():
+            self._timer.start(self._interval)
+
+    def _on_timeout(self):
+        if not self._has_pending:
+            return
+        msg = self._pending
+        self._pending = None
+        self._has_pending = False
+        self._send(msg)
+        if self._leading:
+            # Keep the rate limit for the commands that follow.
+            self._timer.start(self._interval)
+
+
+def register_command(
+    func: Optional[Callable] = None,
+    *,
+    policy: Optional[Union[LatestWins, RateLimit]] = None,
+) -> Callable:
+    """Send the message returned by the decorated method as a command.
+
+    Use as ``@register_command``, or as
+    ``@register_command(policy=LatestWins(50))`` to coalesce bursts of
+    commands, such as the ones of a slider being dragged, into fewer
+    messages. Local callbacks run for the commands that are sent only.
+    """
+
+    def _register(func):
+        @functools.wraps(func)
+        def wrapper(self):
+            res = func(self)
+            if policy is None:
+                self.command_signal.emit(res)
+                return
+            key = (policy, type(res))
+            # Any object with a command_signal can register commands, not
+            # only windows (see set_command_signal).
+            throttles = self.__dict__.setdefault("_command_throttles", {})
+            throttle = throttles.get(key)
+            if throttle is None:
+                parent = self if isinstance(self, QtCore.QObject) else None
+                throttle = _CommandThrottle(policy, self.command_signal.emit, parent)
+                throttles[key] = throttle
+            throttle.submit(res)
+
+        return wrapper
+
+    if func is None:
+        return _register
+    return _register(func)
+
+
+class _QtFrameWriter(FrameWriter):
+    """`FrameWriter` driven by the Qt event loop, so the GUI never blocks."""
+
+    def __init__(self, sock: socket.socket, parent: QtCore.QObject):
+        super().__init__(sock)
+        self._notifier = QtCore.QSocketNotifier(
+            sock.fileno(), QtCore.QSocketNotifier.Type.Write, parent
+        )
+        self._notifier.setEnabled(False)
+        self._notifier.activated.connect(self._flush)
+
+    def _schedule(self):
+        QtCore.QTimer.singleShot(0, self._flush)
+
+    def _watch_writable(self, enable: bool):
+        self._notifier.setEnabled(enable)
 
 
 def register_response(msg_type):
@@ -79,7 +200,11 @@ class EzWindowMeta(type(QtWidgets.QMainWindow)):
 class EzMainWindow(QtWidgets.QMainWindow, metaclass=EzWindowMeta):
     command_signal = QtCore.Signal(object)
 
-    def __init__(self, command_socket, response_socket):
+    def __init__(
+        self,
+        command_socket: Union[socket.socket, InProcessRelay],
+        response_socket: Union[socket.socket, InProcessRelay],
+    ):
         super().__init__()
         self._callbacks = {
             msg_type: [(self, methods)]
@@ -89,8 +214,15 @@ class EzMainWindow(QtWidgets.QMainWindow, metaclass=EzWindowMeta):
 
         # The command socket will send messages from ui to ezmsg.
         self.command_socket = command_socket
+        if not isinstance(self.command_socket, InProcessRelay):
+            # Commands larger than the socket buffer are written in parts.
+            self._command_writer = _QtFrameWriter(self.command_socket, self)
         # The response socket will receive messages from ezmsg to update ui.
         self.response_socket = response_socket
+        if not isinstance(self.response_socket, InProcessRelay):
+            # Responses are read as they arrive, without blocking the GUI.
+            self.response_socket.setblocking(False)
+            self._response_decoder = FrameDecoder()
         # Enable a callback to activate when a response is obtained in the 0MQ subscriber.
         self.response_notification = QtCore.QSocketNotifier(
             self.response_socket.fileno(), QtCore.QSocketNotifier.Type.Read, self
@@ -128,41 +260,33 @@ class EzMainWindow(QtWidgets.QMainWindow, metaclass=EzWindowMeta):
         self.set_command_signal(obj)
         self.add_callbacks(obj)
 
+    def _dispatch(self, msg):
+        for registry in self._callbacks.get(type(msg), list()):
+            obj, callbacks = registry
+            for callback in callbacks:
+                if callable(callback):
+                    callback(obj, msg)
+
     @QtCore.Slot()
     def _on_response(self):
         self.response_notification.setEnabled(False)
-        while True:
-            read_socks, _, _ = select.select([self.response_socket], [], [], 0)
-            if len(read_socks) <= 0:
-                break
-            for sock in read_socks:
-                raw_size_bytes = sock.recv(UINT64_SIZE)
-                raw_size = int.from_bytes(
-                    raw_size_bytes, byteorder=BYTEORDER, signed=False
-                )
-                raw = b""
-                while len(raw) < raw_size:
-                    bytes_to_read = min(raw_size - len(raw), 4096)
-                    raw += sock.recv(bytes_to_read)
-                msg = pickle.loads(raw)
-                for registry in self._callbacks.get(type(msg), list()):
-                    obj, callbacks = registry
-                    for callback in callbacks:
-                        if callable(callback):
-                            callback(obj, msg)
-        self.response_notification.setEnabled(True)
+        if isinstance(self.response_socket, InProcessRelay):
+            for msg in self.response_socket.receive():
+                self._dispatch(msg)
+            self.response_notification.setEnabled(True)
+            return
+        for raw in self._response_decoder.read_from(self.response_socket):
+            self._dispatch(decode_frame(raw))
+        if not self._response_decoder.closed:
+            self.response_notification.setEnabled(True)
 
     @QtCore.Slot(object)
     def _on_command(self, msg):
-        raw = pickle.dumps(msg)
-        raw_size = len(raw).to_bytes(UINT64_SIZE, byteorder=BYTEORDER, signed=False)
-        self.command_socket.send(raw_size)
-        self.command_socket.send(raw)
-        for registry in self._callbacks.get(type(msg), list()):
-            obj, callbacks = registry
-            for callback in callbacks:
-                if callable(callback):
-                    callback(obj, msg)
+        if isinstance(self.command_socket, InProcessRelay):
+            self.command_socket.send(msg)
+        else:
+            self._command_writer.send(msg)
+        self._dispatch(msg)
 
     def add_visual_widgets(self, visuals: dict[str, QtWidgets.QWidget]):
         # Attach visuals to widgets in MainWindow
@@ -176,6 +300,8 @@ class EzMainWindow(QtWidgets.QMainWindow, metaclass=EzWindowMeta):
 
     def closeEvent(self, event):
         self.response_notification.setEnabled(False)
+        if not isinstance(self.command_socket, InProcessRelay):
+            self._command_writer.close()
         self.command_socket.close()
         self.response_socket.close()
         event.accept()
@@ -0,0 +1,423 @@
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import time
+from collections import deque
+from typing import Any
+from typing import Optional
+
+from ..helpers.constants import BYTEORDER
+from ..helpers.constants import UINT64_SIZE
+from .codecs import codec_by_id
+from .codecs import codec_for
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per call of FrameDecoder.read_from, so the GUI stays responsive.
+READ_BUDGET = 16 * 1024 * 1024
+# Bytes requested per read of FrameStreamReader, larger frames are read at once.
+READ_SIZE = 64 * 1024
+# Alignment of the out-of-band buffers within a frame, in bytes.
+BUFFER_ALIGNMENT = 64
+
+_PADDING = bytes(BUFFER_ALIGNMENT)
+
+try:
+    # Most buffers a single sendmsg accepts.
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, OSError, ValueError):
+    IOV_MAX = 1024
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // BUFFER_ALIGNMENT) * BUFFER_ALIGNMENT
+
+
+def encode_frame(msg: Any) -> list:
+    """Serialize a message into the buffers of one frame, without copying arrays.
+
+    The message is encoded by the codec registered for its type, pickle
+    protocol 5 by default, see `codecs.register_codec`. Codecs leave the
+    memory of arrays out of the encoded message. Those buffers become
+    segments of the frame, written to the socket as they are by a
+    `FrameWriter`. The frame is laid out as::
+
+        uint64 size of the rest of the frame
+        uint64 codec id
+        uint64 number of segments N
+        N x uint64 segment sizes
+        N segments, each starting on a BUFFER_ALIGNMENT boundary
+
+    where the first segment is the encoded message.
+
+    Returns
+    -------
+    list[memoryview | bytes]
+        Buffers to write, in order. They reference the memory of ``msg``,
+        which must not change until they are written.
+    """
+    codec_id, codec = codec_for(type(msg))
+    segments = [memoryview(segment) for segment in codec.encode(msg)]
+    header = [codec_id, len(segments)] + [segment.nbytes for segment in segments]
+    offset = UINT64_SIZE * len(header)
+    buffers = []
+    for segment in segments:
+        padding = _aligned(offset) - offset
+        if padding:
+            buffers.append(_PADDING[:padding])
+        buffers.append(segment)
+        offset += padding + segment.nbytes
+    header.insert(0, offset)
+    raw_header = b"".join(
+        value.to_bytes(UINT64_SIZE, byteorder=BYTEORDER, signed=False)
+        for value in header
+    )
+    return [raw_header] + buffers
+
+
+def decode_frame(payload) -> Any:
+    """Rebuild a message from a frame payload read after its size.
+
+    Arrays are reconstructed over the memory of ``payload`` instead of
+    being copied; they are writable if ``payload`` is a bytearray.
+    """
+    view = memoryview(payload)
+    codec_id, count = (
+        int.from_bytes(view[start : start + UINT64_SIZE], byteorder=BYTEORDER)
+        for start in (0, UINT64_SIZE)
+    )
+    offset = UINT64_SIZE * (count + 2)
+    segments = []
+    for index in range(2, count + 2):
+        start = UINT64_SIZE * index
+        size = int.from_bytes(
+            view[start : start + UINT64_SIZE], byteorder=BYTEORDER, signed=False
+        )
+        offset = _aligned(offset)
+        segments.append(view[offset : offset + size])
+        offset += size
+    return codec_by_id(codec_id).decode(segments)
+
+
+class FrameWriter:
+    """Write frames to a non-blocking socket from an asyncio event loop.
+
+    `send` only queues the buffers of a frame. The queue is flushed once
+    per event loop turn, with one vectored write (``sendmsg``) for all the
+    frames queued during the turn. When the socket is full, the rest of
+    the queue, starting with the unwritten part of a buffer, is written
+    when the socket becomes writable again. The number of frames waiting
+    in the queue tells whether the reader falls behind.
+
+    Subclasses can run it on another event loop by overriding `_schedule`
+    and `_watch_writable`.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        Socket to write to. It is made non-blocking.
+    loop : asyncio.AbstractEventLoop
+        Event loop of the thread calling `send`.
+    """
+
+    def __init__(
+        self, sock: socket.socket, loop: Optional[asyncio.AbstractEventLoop] = None
+    ):
+        self._sock = sock
+        self._sock.setblocking(False)
+        self._loop = loop
+        self._buffers: deque = deque()
+        # Total bytes queued and written so far, and the byte count at
+        # which each queued frame is fully written.
+        self._queued = 0
+        self._written = 0
+        self._frame_ends: deque = deque()
+        self._scheduled = False
+        self._waiting = False
+        self.closed = False
+
+        self._reported_at = time.perf_counter()
+        self.messages = 0
+        self.writes = 0
+        self.bytes = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of frames not fully written yet."""
+        return len(self._frame_ends)
+
+    @property
+    def queued_bytes(self) -> int:
+        return self._queued - self._written
+
+    def send(self, msg: Any):
+        """Queue a message, to be written at the end of the loop turn."""
+        if self.closed:
+            return
+        for buffer in encode_frame(msg):
+            view = memoryview(buffer).cast("B")
+            if view.nbytes:
+                self._buffers.append(view)
+                self._queued += view.nbytes
+        self._frame_ends.append(self._queued)
+        self.messages += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        if not self._scheduled and not self._waiting:
+            self._scheduled = True
+            self._schedule()
+
+    def _schedule(self):
+        """Call `_flush` once the current loop turn is over."""
+        self._loop.call_soon(self._flush)
+
+    def _watch_writable(self, enable: bool):
+        """Start or stop calling `_flush` whenever the socket is writable."""
+        if enable:
+            self._loop.add_writer(self._sock, self._flush)
+        else:
+            self._loop.remove_writer(self._sock)
+
+    def _flush(self):
+        self._scheduled = False
+        while self._buffers:
+            batch = list(itertools.islice(self._buffers, IOV_MAX))
+            try:
+                if hasattr(self._sock, "sendmsg"):
+                    sent = self._sock.sendmsg(batch)
+                else:
+                    # Windows has no sendmsg.
+                    sent = self._sock.send(batch[0])
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as err:
+                logger.warning(f"Relay socket closed: {err}")
+                self.close()
+                return
+            self.writes += 1
+            self.bytes += sent
+            self._consume(sent)
+            if sent < sum(buffer.nbytes for buffer in batch):
+                # The socket is full.
+                break
+        if self._buffers and not self._waiting:
+            self._watch_writable(True)
+            self._waiting = True
+        elif not self._buffers and self._waiting:
+            self._watch_writable(False)
+            self._waiting = False
+
+    def _consume(self, sent: int):
+        self._written += sent
+        while sent:
+            buffer = self._buffers[0]
+            if sent < buffer.nbytes:
+                self._buffers[0] = buffer[sent:]
+                break
+            sent -= buffer.nbytes
+            self._buffers.popleft()
+        while self._frame_ends and self._frame_ends[0] <= self._written:
+            self._frame_ends.popleft()
+
+    def close(self):
+        """Drop the queued frames and stop writing. The socket stays open."""
+        if self._waiting:
+            self._watch_writable(False)
+            self._waiting = False
+        self.closed = True
+        self._buffers.clear()
+        self._frame_ends.clear()
+        self._written = self._queued
+
+    def report(self) -> dict:
+        """Values for the period since the previous report, then reset them."""
+        now = time.perf_counter()
+        values = dict(
+            period=now - self._reported_at,
+            messages=self.messages,
+            writes=self.writes,
+            bytes=self.bytes,
+            queue_depth=self.queue_depth,
+            queued_bytes=self.queued_bytes,
+            max_queue_depth=self.max_queue_depth,
+        )
+        self._reported_at = now
+        self.messages = 0
+        self.writes = 0
+        self.bytes = 0
+        self.max_queue_depth = self.queue_depth
+        return values
+
+
+class FrameDecoder:
+    """Reassemble length-prefixed frames read from a non-blocking socket.
+
+    A frame is a uint64 size followed by that many bytes, see
+    `encode_frame`. The payload of
+    each frame is read straight into a bytearray of the announced size
+    with ``recv_into``. A frame that is not complete when the socket runs
+    dry is kept and continued on the next call, so a reader driven by a
+    `QSocketNotifier` never blocks.
+    """
+
+    def __init__(self):
+        self._header = bytearray(UINT64_SIZE)
+        self._payload: Optional[bytearray] = None
+        self._filled = 0
+        # Set once the peer closed the socket.
+        self.closed = False
+
+    def read_from(self, sock: socket.socket, budget: int = READ_BUDGET) -> list:
+        """Read what is available, up to about ``budget`` bytes.
+
+        Returns
+        -------
+        list[bytearray]
+            The payloads of the frames completed by this call.
+        """
+        frames = []
+        read = 0
+        while read < budget:
+            buffer = self._header if self._payload is None else self._payload
+            try:
+                num_bytes = sock.recv_into(memoryview(buffer)[self._filled :])
+            except (BlockingIOError, InterruptedError):
+                break
+            if num_bytes == 0:
+                self.closed = True
+                break
+            read += num_bytes
+            self._filled += num_bytes
+            if self._filled < len(buffer):
+                continue
+            self._filled = 0
+            if self._payload is None:
+                size = int.from_bytes(self._header, byteorder=BYTEORDER, signed=False)
+                self._payload = bytearray(size)
+                if size > 0:
+                    continue
+            frames.append(self._payload)
+            self._payload = None
+        return frames
+
+
+class FrameStreamReader:
+    """Read frames from an `asyncio.StreamReader`, in batches.
+
+    Small frames are read in chunks of up to READ_SIZE bytes, so all the
+    frames that arrived together are split out of a single read. The rest
+    of a frame larger than that is read with one ``readexactly`` call, into
+    a buffer of the frame size.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self._reader = reader
+        self._buffer = bytearray()
+
+    async def read_batch(self) -> list:
+        """Wait for a frame, then take every complete frame received so far.
+
+        Returns
+        -------
+        list[bytearray]
+            The frame payloads, oldest first. Empty at the end of the stream.
+        """
+        while True:
+            frames = self._split()
+            if frames:
+                return frames
+            try:
+                if len(self._buffer) >= UINT64_SIZE:
+                    size = int.from_bytes(
+                        self._buffer[:UINT64_SIZE], byteorder=BYTEORDER, signed=False
+                    )
+                    missing = UINT64_SIZE + size - len(self._buffer)
+                    if missing > READ_SIZE:
+                        return [await self._read_large(size, missing)]
+                chunk = await self._reader.read(READ_SIZE)
+            except asyncio.IncompleteReadError:
+                return []
+            if not chunk:
+                return []
+            self._buffer += chunk
+
+    async def _read_large(self, size: int, missing: int) -> bytearray:
+        payload = bytearray(size)
+        received = size - missing
+        payload[:received] = memoryview(self._buffer)[UINT64_SIZE:]
+        self._buffer.clear()
+        payload[received:] = await self._reader.readexactly(missing)
+        return payload
+
+    def _split(self) -> list:
+        frames = []
+        offset = 0
+        while len(self._buffer) - offset >= UINT64_SIZE:
+            start = offset + UINT64_SIZE
+            size = int.from_bytes(
+                self._buffer[offset:start], byteorder=BYTEORDER, signed=False
+            )
+            if len(self._buffer) < start + size:
+                break
+            frames.append(self._buffer[start : start + size])
+            offset = start + size
+        if offset:
+            del self._buffer[:offset]
+        return frames
+
+
+class InProcessRelay:
+    """One-way channel handing Python objects between two threads.
+
+    Messages are passed by reference through a deque, without being
+    serialized. A socket pair carries a wake-up byte, so the receiving
+    side can wait on `fileno` with a `QSocketNotifier` or an asyncio
+    reader, like it would on the socket of an out-of-process frontend.
+
+    The sender must not modify a message after sending it, since the
+    receiver gets the very same object.
+    """
+
+    def __init__(self):
+        self._queue: deque = deque()
+        self._awake = False
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+
+    def fileno(self) -> int:
+        """File descriptor that becomes readable when messages are queued."""
+        return self._wake_reader.fileno()
+
+    def send(self, msg: Any):
+        """Queue a message for the receiver. Safe to call from any thread."""
+        self._queue.append(msg)
+        if not self._awake:
+            self._awake = True
+            try:
+                self._wake_writer.send(b"\x00")
+            except (BlockingIOError, OSError):
+                # A wake-up is already pending, or the relay is closed.
+                pass
+
+    def receive(self) -> list[Any]:
+        """All queued messages, oldest first. Never blocks."""
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        # Clear the flag before reading the queue, so later sends wake us.
+        self._awake = False
+        messages = []
+        while True:
+            try:
+                messages.append(self._queue.popleft())
+            except IndexError:
+                return messages
+
+    def close(self):
+        self._wake_reader.close()
+        self._wake_writer.close()
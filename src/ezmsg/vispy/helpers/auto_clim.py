@@ -0,0 +1,129 @@
+import math
+from typing import Optional
+
+import numpy as np
+
+
+class AutoClim:
+    """Color limits following percentiles of a stream of images.
+
+    Every update adds a strided subsample of at most ``max_samples``
+    values of the image to a histogram, after decaying the counts already
+    in it, so the limits track the recent images without a full pass over
+    each one. The limits are percentiles of the histogram, so a few hot
+    pixels do not stretch the scale, and they only move once a percentile
+    moved by more than ``hysteresis`` of the current range, which keeps the
+    colorbar from jittering.
+
+    The bins span the percentiles of the recent images with some margin.
+    Values outside of them, like hot pixels, are counted in the first or
+    last bin, so they never stretch the bins. The range is rebuilt around
+    the percentiles of a new image that fall outside of it, and shrinks
+    around the percentiles once they use a small part of it.
+
+    Parameters
+    ----------
+    percentiles : tuple[float, float]
+        Lower and upper percentile, in percent.
+    bins : int
+        Number of bins of the histogram.
+    max_samples : int
+        Values of each image added to the histogram, at most.
+    memory : float
+        Number of values the histogram remembers: counts decay by a factor
+        of e every ``memory`` values added.
+    hysteresis : float
+        Fraction of the range the percentiles must move by to change the
+        limits.
+    """
+
+    def __init__(
+        self,
+        percentiles: tuple[float, float] = (1.0, 99.0),
+        bins: int = 256,
+        max_samples: int = 16384,
+        memory: float = 65536,
+        hysteresis: float = 0.05,
+    ):
+        self.percentiles = percentiles
+        self.max_samples = max_samples
+        self.memory = memory
+        self.hysteresis = hysteresis
+        self._counts = np.zeros(bins)
+        self._edges: Optional[np.ndarray] = None
+        # Limits applied to the image, None until values arrived.
+        self.limits: Optional[tuple[float, float]] = None
+
+    def reset(self):
+        self._counts[:] = 0
+        self._edges = None
+        self.limits = None
+
+    def _subsample(self, data: np.ndarray, transform=None) -> np.ndarray:
+        # A strided view over the first two axes, then the finite values.
+        stride = max(1, math.ceil(math.sqrt(data.size / self.max_samples)))
+        sample = data[::stride, ::stride] if data.ndim >= 2 else data[::stride]
+        if transform is not None:
+            sample = transform(sample)
+        sample = np.asarray(sample, dtype=np.float64).reshape(-1)
+        return sample[np.isfinite(sample)]
+
+    def _rebin(self, low: float, high: float):
+        """Move the counts to bins spanning [low, high]."""
+        edges = np.linspace(low, high, len(self._counts) + 1)
+        if self._edges is not None and self._counts.any():
+            # Counts outside of the new range go to its first and last bins.
+            cumulative = np.concatenate(([0.0], np.cumsum(self._counts)))
+            moved = np.interp(edges, self._edges, cumulative)
+            moved[0], moved[-1] = 0.0, cumulative[-1]
+            self._counts = np.diff(moved)
+        self._edges = edges
+
+    def _percentile_values(self) -> tuple[float, float]:
+        cumulative = np.concatenate(([0.0], np.cumsum(self._counts)))
+        cumulative /= cumulative[-1]
+        low, high = np.interp(
+            np.asarray(self.percentiles) / 100, cumulative, self._edges
+        )
+        return float(low), float(high)
+
+    def update(self, data: np.ndarray, transform=None) -> bool:
+        """Add an image. Returns True if the limits changed.
+
+        ``transform``, if given, maps the subsample of the image to the
+        values shown, e.g. complex values to their magnitudes.
+        """
+        sample = self._subsample(np.asarray(data), transform)
+        if sample.size == 0:
+            return False
+        # The bins follow the percentiles of the new values, not their
+        # extremes, which go to the first and last bins.
+        low, high = np.percentile(sample, self.percentiles)
+        if self._edges is None or low < self._edges[0] or high > self._edges[-1]:
+            span = high - low if high > low else max(abs(high), 1.0)
+            self._rebin(low - span / 2, high + span / 2)
+        sample = np.clip(sample, self._edges[0], self._edges[-1])
+
+        self._counts *= math.exp(-sample.size / self.memory)
+        counts, _ = np.histogram(sample, bins=self._edges)
+        self._counts += counts
+
+        low, high = self._percentile_values()
+        span = self._edges[-1] - self._edges[0]
+        if high - low < span / 8:
+            # Zoom the bins in on the values, keeping some margin.
+            margin = max(high - low, span / 1024)
+            self._rebin(low - margin, high + margin)
+            low, high = self._percentile_values()
+        if high <= low:
+            high = low + max(abs(low) * 1e-6, 1e-12)
+
+        if self.limits is not None:
+            threshold = self.hysteresis * (self.limits[1] - self.limits[0])
+            if (
+                abs(low - self.limits[0]) <= threshold
+                and abs(high - self.limits[1]) <= threshold
+            ):
+                return False
+        self.limits = (low, high)
+        return True
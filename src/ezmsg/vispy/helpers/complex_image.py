@@ -0,0 +1,140 @@
+import numpy as np
+
+from vispy import scene
+from vispy.visuals import ImageVisual
+from vispy.visuals.shaders import Function
+from vispy.visuals.shaders import FunctionChain
+
+COMPLEX_MODES = ("real", "imaginary", "magnitude", "phase")
+
+# The texture holds the real part in r and the imaginary part in g. The mode
+# and the log scale are uniforms, so changing them does not rebuild the
+# shader.
+_COMPLEX_REDUCE = """
+float complex_reduce(vec4 data) {
+    float value;
+    if ($mode < 0.5) {
+        value = data.r;
+    } else if ($mode < 1.5) {
+        value = data.g;
+    } else if ($mode < 2.5) {
+        value = length(data.rg);
+    } else {
+        return atan(data.g, data.r);
+    }
+    if ($log_scale > 0.5) {
+        value = 20.0 * log(abs(value)) / log(10.0);
+    }
+    return value;
+}
+"""
+
+
+def as_complex_pairs(data: np.ndarray) -> np.ndarray:
+    """View a complex image as float32 (real, imaginary) pairs.
+
+    Contiguous complex64 images are viewed without a copy, other images
+    are converted or copied.
+    """
+    data = np.asarray(data).astype(np.complex64, copy=False)
+    if data.ndim and data.strides[-1] != data.itemsize:
+        # Transposed or strided frames cannot be viewed as pairs.
+        data = np.ascontiguousarray(data)
+    return data.view(np.float32).reshape(data.shape + (2,))
+
+
+def reduce_complex(data: np.ndarray, mode: str, log_scale: bool) -> np.ndarray:
+    """CPU version of the shader reduction, for color limits."""
+    if mode == "phase":
+        return np.angle(data)
+    value = {"real": np.real, "imaginary": np.imag, "magnitude": np.abs}[mode](data)
+    if log_scale:
+        with np.errstate(divide="ignore"):
+            value = 20 * np.log10(np.abs(value))
+    return value
+
+
+class ComplexImageVisual(ImageVisual):
+    """Complex image reduced to real values on the GPU.
+
+    Frames are uploaded as they are, as a two-channel float texture, and
+    the real part, imaginary part, magnitude or phase of each pixel is
+    computed in the fragment shader. Unlike `vispy.scene.visuals.ComplexImage`,
+    changing ``complex_mode`` or ``log_scale`` only sets a uniform, and
+    color limits are never computed from the frames, so they should be
+    given (see `reduce_complex` to compute them from a sample).
+
+    Parameters
+    ----------
+    data : np.ndarray | None
+        Complex image, converted to complex64 if needed.
+    complex_mode : str
+        ``"real"``, ``"imaginary"``, ``"magnitude"`` or ``"phase"``.
+    log_scale : bool
+        Show ``20 * log10(abs(value))``. Not applied to the phase.
+    **kwargs : dict
+        Keyword arguments to pass to `ImageVisual`.
+    """
+
+    def __init__(self, data=None, complex_mode="magnitude", log_scale=False, **kwargs):
+        if complex_mode not in COMPLEX_MODES:
+            raise ValueError(
+                "complex_mode must be one of %s" % ", ".join(COMPLEX_MODES)
+            )
+        self._complex_mode = complex_mode
+        self._log_scale = bool(log_scale)
+        self._reduce = Function(_COMPLEX_REDUCE)
+        self._reduce["mode"] = float(COMPLEX_MODES.index(complex_mode))
+        self._reduce["log_scale"] = float(self._log_scale)
+        kwargs["texture_format"] = "r32f"
+        if data is not None:
+            data = as_complex_pairs(data)
+        super().__init__(data, **kwargs)
+
+    def _init_texture(self, data, texture_format, **texture_kwargs):
+        if data is None:
+            # Gives the texture its two channels until data is set.
+            data = np.zeros((1, 1, 2), np.float32)
+        return super()._init_texture(data, texture_format, format="rg")
+
+    @property
+    def complex_mode(self) -> str:
+        return self._complex_mode
+
+    @complex_mode.setter
+    def complex_mode(self, value: str):
+        if value not in COMPLEX_MODES:
+            raise ValueError(
+                "complex_mode must be one of %s" % ", ".join(COMPLEX_MODES)
+            )
+        self._complex_mode = value
+        self._reduce["mode"] = float(COMPLEX_MODES.index(value))
+        self.update()
+
+    @property
+    def log_scale(self) -> bool:
+        return self._log_scale
+
+    @log_scale.setter
+    def log_scale(self, value: bool):
+        self._log_scale = bool(value)
+        self._reduce["log_scale"] = float(self._log_scale)
+        self.update()
+
+    def set_data(self, image, copy=False):
+        data = np.asarray(image)
+        if data.ndim == 2:
+            data = as_complex_pairs(data)
+        super().set_data(data, copy=copy)
+
+    def _build_color_transform(self):
+        fclim = Function(self._func_templates["clim_float"])
+        fgamma = Function(self._func_templates["gamma_float"])
+        fclim["clim"] = self._texture.clim_normalized
+        fgamma["gamma"] = self.gamma
+        return FunctionChain(
+            None, [self._reduce, fclim, fgamma, Function(self.cmap.glsl_map)]
+        )
+
+
+ComplexImage = scene.visuals.create_visual_node(ComplexImageVisual)
@@ -0,0 +1,234 @@
+import math
+from typing import Optional
+
+import numpy as np
+
+
+def minmax_envelope(data: np.ndarray, spp: int) -> np.ndarray:
+    """Reduce samples to the min and max of every column of ``spp`` samples.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Samples of shape (time, channels).
+    spp : int
+        Number of samples per column. The last column may be shorter.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (2 * columns, channels) holding the min and the max
+        of every column, interleaved.
+    """
+    starts = np.arange(0, data.shape[0], spp)
+    envelope = np.empty((2 * len(starts),) + data.shape[1:], dtype=data.dtype)
+    if len(starts):
+        envelope[0::2] = np.minimum.reduceat(data, starts, axis=0)
+        envelope[1::2] = np.maximum.reduceat(data, starts, axis=0)
+    return envelope
+
+
+def samples_per_pixel(span: float, pixels: float, dt: float) -> int:
+    """Number of samples per column when showing ``span`` x units on screen.
+
+    The result is rounded down to a power of two, so small zoom steps do not
+    change the level of detail.
+    """
+    if pixels <= 0 or dt <= 0:
+        return 1
+    spp = span / (pixels * dt)
+    if spp < 2:
+        return 1
+    return 2 ** int(math.log2(spp))
+
+
+class MinMaxRing:
+    """Ring buffer of the min/max envelope of a stream of samples.
+
+    Column ``k`` holds the min and max of samples ``k * spp`` to
+    ``(k + 1) * spp`` of the stream, in ring slots ``2 * (k % columns)``
+    and ``2 * (k % columns) + 1``. Appending samples only recomputes the
+    columns they fall in; the newest column grows until it is complete.
+
+    The slots are laid out like the sample ring of a `RollTransform`, with
+    ``x`` spaced by ``spp * dt / 2`` and one column more than the window so
+    the oldest column can serve as the gap.
+
+    Parameters
+    ----------
+    window : int
+        Number of samples in the displayed window.
+    channels : int
+        Number of channels.
+    dt : float
+        Spacing between two samples in x units.
+    spp : int
+        Number of samples per column.
+    count : int
+        Index in the stream of the next sample that will be appended.
+    """
+
+    def __init__(self, window: int, channels: int, dt: float, spp: int, count: int = 0):
+        self.spp = spp
+        self.columns = math.ceil(window / spp) + 1
+        self.dt = spp * dt / 2
+        self.x = (np.arange(2 * self.columns) * self.dt).astype(np.float32)
+        self.y = np.zeros((2 * self.columns, channels), np.float32)
+        self.count = count
+
+    @property
+    def period(self) -> float:
+        return len(self.x) * self.dt
+
+    @property
+    def head(self) -> int:
+        """Slot holding the max of the newest column."""
+        return (2 * ((self.count - 1) // self.spp) + 1) % len(self.x)
+
+    def append(self, data: np.ndarray) -> list[tuple[int, int]]:
+        """Add samples of shape (time, channels) to the envelope.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            The (start, stop) spans of ``y`` that changed.
+        """
+        num_pts = data.shape[0]
+        if num_pts == 0:
+            return []
+        first_col = self.count // self.spp
+        # Split the new samples at column boundaries.
+        offset = self.count % self.spp
+        starts = np.arange(-offset, num_pts, self.spp)
+        starts[0] = 0
+        mins = np.minimum.reduceat(data, starts, axis=0)
+        maxs = np.maximum.reduceat(data, starts, axis=0)
+        cols = (first_col + np.arange(len(starts))) % self.columns
+        if offset:
+            # The first column already holds some samples.
+            np.minimum(mins[0], self.y[2 * cols[0]], out=mins[0])
+            np.maximum(maxs[0], self.y[2 * cols[0] + 1], out=maxs[0])
+        self.y[2 * cols] = mins
+        self.y[2 * cols + 1] = maxs
+        self.count += num_pts
+
+        if len(cols) > self.columns:
+            return [(0, len(self.x))]
+        start, stop = 2 * int(cols[0]), 2 * int(cols[-1]) + 2
+        if stop > start:
+            return [(start, stop)]
+        return [(start, len(self.x)), (0, stop)]
+
+
+class StreamDecimator:
+    """Decimates a stream of samples along its first axis.
+
+    Samples are reduced in buckets of ``bucket`` samples. Samples that do
+    not complete a bucket are kept and reduced with the next call, so the
+    output does not depend on how the stream is split into messages.
+
+    Parameters
+    ----------
+    bucket : int
+        Number of samples per bucket.
+    """
+
+    # Points emitted for every bucket.
+    points_per_bucket: int = 1
+
+    def __init__(self, bucket: int):
+        self.bucket = bucket
+        self._pending: Optional[np.ndarray] = None
+
+    @property
+    def pending(self) -> int:
+        """Samples kept from previous calls, not reduced yet."""
+        return 0 if self._pending is None else self._pending.shape[0]
+
+    def _join(self, data: np.ndarray) -> np.ndarray:
+        if self.pending == 0:
+            return data
+        return np.concatenate((self._pending, data))
+
+    def _keep(self, data: np.ndarray):
+        # Copied, the caller may reuse the memory of its message.
+        self._pending = data.copy()
+
+    def process(self, data: np.ndarray) -> np.ndarray:
+        """Reduce samples of shape (time, ...) and the pending ones.
+
+        Returns
+        -------
+        np.ndarray
+            ``points_per_bucket`` points per bucket reduced by this call,
+            possibly none.
+        """
+        raise NotImplementedError
+
+
+class MinMaxDecimator(StreamDecimator):
+    """Min and max of every bucket, see `minmax_envelope`."""
+
+    points_per_bucket = 2
+
+    def process(self, data: np.ndarray) -> np.ndarray:
+        data = self._join(data)
+        complete = data.shape[0] - data.shape[0] % self.bucket
+        self._keep(data[complete:])
+        return minmax_envelope(data[:complete], self.bucket)
+
+
+class LTTBDecimator(StreamDecimator):
+    """Largest-Triangle-Three-Buckets, for every channel independently.
+
+    Every bucket keeps the sample forming the largest triangle with the
+    sample kept from the previous bucket and the mean of the next bucket,
+    which preserves the shape of the signal better than a min/max envelope
+    at one point per bucket. A bucket is reduced once the next one is
+    complete, so one bucket is always kept for the next call.
+
+    Channels are reduced together, each bucket in a single pass over all
+    its samples; the kept samples, and their times, differ per channel.
+    """
+
+    def __init__(self, bucket: int):
+        super().__init__(bucket)
+        # Last kept sample of every channel, and its index relative to the
+        # first pending sample.
+        self._last: Optional[np.ndarray] = None
+        self._last_index: Optional[np.ndarray] = None
+
+    def process(self, data: np.ndarray) -> np.ndarray:
+        data = self._join(data)
+        n = self.bucket
+        buckets = data.shape[0] // n - 1
+        if buckets <= 0:
+            self._keep(data)
+            return data[:0]
+        flat = data.reshape(data.shape[0], -1)
+        means = flat[: (buckets + 1) * n].reshape(buckets + 1, n, -1).mean(axis=1)
+        if self._last is None:
+            self._last = flat[0].astype(np.float64)
+            self._last_index = np.zeros(flat.shape[1])
+        last, last_index = self._last, self._last_index
+        channels = np.arange(flat.shape[1])
+        index = np.arange(n, dtype=np.float64)[:, np.newaxis]
+        # Center of the next bucket, relative to the start of the current one.
+        center = n + (n - 1) / 2
+        out = np.empty((buckets, flat.shape[1]), dtype=data.dtype)
+        for b in range(buckets):
+            y = flat[b * n : (b + 1) * n]
+            # Twice the area of the triangles, relative to the bucket start.
+            last_x = last_index - b * n
+            area = np.abs(
+                (last_x - center) * (y - last)
+                - (last_x - index) * (means[b + 1] - last)
+            )
+            pick = area.argmax(axis=0)
+            out[b] = y[pick, channels]
+            last = out[b].astype(np.float64)
+            last_index = b * n + pick
+        self._last = last
+        self._last_index = last_index - buckets * n
+        self._keep(data[buckets * n :])
+        return out.reshape((buckets,) + data.shape[1:])
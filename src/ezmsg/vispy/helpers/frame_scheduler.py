@@ -0,0 +1,115 @@
+import logging
+import socket
+import time
+from collections import deque
+from typing import Callable
+from typing import Optional
+
+from qtpy import QtCore
+
+from .constants import TIMER_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class FrameScheduler(QtCore.QObject):
+    """Update visuals on the Qt thread only when they have new data.
+
+    Any thread can `mark_dirty` a visual with the callback that updates
+    it. The first mark after a frame writes a byte to a socket pair watched
+    by a `QSocketNotifier`, which wakes the Qt event loop. The scheduler
+    then waits until ``interval`` ms have passed since the previous frame
+    and runs every callback marked in the meantime once. Without new data, no timer runs
+    and the Qt thread sleeps.
+
+    Use `instance` to get the scheduler shared by all visuals, once the
+    QApplication exists.
+
+    Parameters
+    ----------
+    interval : int
+        Minimum time between two frames, in ms.
+    """
+
+    _instance: Optional["FrameScheduler"] = None
+
+    def __init__(self, interval: int = TIMER_INTERVAL, parent=None):
+        super().__init__(parent)
+        self.interval = interval
+        self._dirty: deque = deque()
+        self._awake = False
+        self._last_frame = 0.0
+
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._notifier = QtCore.QSocketNotifier(
+            self._wake_reader.fileno(), QtCore.QSocketNotifier.Type.Read, self
+        )
+        self._notifier.activated.connect(self._on_wake)
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_frame)
+
+        # Number of frames run, and of marks merged into them.
+        self.frames = 0
+        self.coalesced = 0
+
+    @classmethod
+    def instance(cls) -> "FrameScheduler":
+        """The scheduler shared by all visuals."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def mark_dirty(self, callback: Callable[[], None]):
+        """Schedule ``callback`` for the next frame. Thread-safe."""
+        self._dirty.append(callback)
+        if not self._awake:
+            self._awake = True
+            try:
+                self._wake_writer.send(b"\x00")
+            except (BlockingIOError, OSError):
+                # A wake-up is already pending, or the scheduler is closed.
+                pass
+
+    def _on_wake(self):
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        # Clear the flag before reading the marks, so later marks wake us.
+        self._awake = False
+        if not self._timer.isActive():
+            elapsed = 1000 * (time.perf_counter() - self._last_frame)
+            self._timer.start(max(0, int(self.interval - elapsed)))
+
+    def _on_frame(self):
+        self._last_frame = time.perf_counter()
+        callbacks = []
+        while True:
+            try:
+                callback = self._dirty.popleft()
+            except IndexError:
+                break
+            if callback in callbacks:
+                self.coalesced += 1
+            else:
+                callbacks.append(callback)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception(f"Frame callback {callback} failed")
+        self.frames += 1
+
+    def close(self):
+        self._timer.stop()
+        self._notifier.setEnabled(False)
+        self._wake_reader.close()
+        self._wake_writer.close()
+        self._dirty.clear()
+        if FrameScheduler._instance is self:
+            FrameScheduler._instance = None
@@ -0,0 +1,184 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# Timestamps kept at most in each deque, when nothing takes them.
+MAX_TIMESTAMPS = 4096
+
+
+class PlotMetrics:
+    """Performance counters of a plot, reset every time they are reported.
+
+    The subscribers (ezmsg event loop) count received and dropped messages.
+    The Qt thread times the updates and draws. Every received message is
+    timestamped, so the delay between its arrival and the draw that first
+    shows it can be measured. Counters are plain attributes and deques,
+    which the GIL keeps consistent enough for telemetry without locks.
+
+    The deques are bounded, as a plot can stay hidden or go unreported for
+    long, and timestamps are not taken at all when ``timestamps`` is False,
+    e.g. when metrics are not published.
+    """
+
+    def __init__(self, timestamps: bool = True):
+        self.timestamps = timestamps
+        self.messages = 0
+        self.samples = 0
+        self.dropped = 0
+        self.updates = 0
+        self.update_time = 0.0
+        self.max_update_time = 0.0
+        self.draws = 0
+        # Most samples staged for a single update.
+        self.staging_high_water = 0
+        # Arrival times of the messages not yet used by an update.
+        self._received: deque = deque(maxlen=MAX_TIMESTAMPS)
+        # Arrival times of the messages used by an update, not yet drawn.
+        self._updated: deque = deque(maxlen=MAX_TIMESTAMPS)
+        self._latencies: deque = deque(maxlen=MAX_TIMESTAMPS)
+        self._reported_at = time.perf_counter()
+        self._coalesced = 0
+        self._upload_bytes = 0
+
+    def receive(self, samples: int = 0):
+        """Count a message received by a subscriber."""
+        self.messages += 1
+        self.samples += samples
+        if self.timestamps:
+            self._received.append(time.perf_counter())
+
+    def forward(self):
+        """Count a message passed on to the plot in another process.
+
+        Its arrival is not timestamped: no update on this side takes it.
+        """
+        self.messages += 1
+
+    def drop(self):
+        """Count a message discarded by a subscriber."""
+        self.messages += 1
+        self.dropped += 1
+
+    def stage(self, samples: int):
+        """Count samples staged for an update, e.g. by a `StagingBuffer`."""
+        self.staging_high_water = max(self.staging_high_water, samples)
+
+    def take_received(self) -> list[float]:
+        """Arrival times of the messages received since the last call."""
+        received = []
+        while True:
+            try:
+                received.append(self._received.popleft())
+            except IndexError:
+                return received
+
+    def update(self, duration: float, received: list[float]):
+        """Count an update that used the messages received at ``received``."""
+        self.updates += 1
+        self.update_time += duration
+        self.max_update_time = max(self.max_update_time, duration)
+        self._updated.extend(received)
+
+    def draw(self):
+        """Count a draw, which shows the data of the previous updates."""
+        now = time.perf_counter()
+        self.draws += 1
+        while True:
+            try:
+                self._latencies.append(now - self._updated.popleft())
+            except IndexError:
+                break
+
+    def report(self, coalesced: int, upload_bytes: int) -> dict:
+        """Values for the period since the previous report, then reset them.
+
+        Parameters
+        ----------
+        coalesced : int
+            Total number of messages merged into a pending frame.
+        upload_bytes : int
+            Total number of bytes uploaded to the GPU.
+        """
+        now = time.perf_counter()
+        period = now - self._reported_at
+        latencies = [self._latencies.popleft() for _ in range(len(self._latencies))]
+        if latencies:
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        else:
+            p50 = p90 = p99 = float("nan")
+        values = dict(
+            period=period,
+            messages=self.messages,
+            samples=self.samples,
+            coalesced=coalesced - self._coalesced,
+            dropped=self.dropped,
+            updates=self.updates,
+            update_time=self.update_time / max(self.updates, 1),
+            max_update_time=self.max_update_time,
+            upload_bytes=upload_bytes - self._upload_bytes,
+            staging_high_water=self.staging_high_water,
+            fps=self.draws / period if period > 0 else 0.0,
+            latency_p50=float(p50),
+            latency_p90=float(p90),
+            latency_p99=float(p99),
+        )
+        self._reported_at = now
+        self._coalesced = coalesced
+        self._upload_bytes = upload_bytes
+        self.messages = 0
+        self.samples = 0
+        self.dropped = 0
+        self.updates = 0
+        self.update_time = 0.0
+        self.max_update_time = 0.0
+        self.draws = 0
+        self.staging_high_water = 0
+        return values
+
+
+def merge_remote_reports(local: dict, remote: list[dict]) -> dict:
+    """Combine the report of a proxy with those of its plot in a GUI process.
+
+    The proxy only forwards messages, so its report counts the messages
+    and the ones dropped because the ring was full. Everything else comes
+    from the reports the GUI process sent over the period, which may be
+    more or less than one.
+
+    Parameters
+    ----------
+    local : dict
+        Report of the proxy, see `PlotMetrics.report`.
+    remote : list[dict]
+        Reports of the plot in the GUI process, oldest first.
+    """
+    values = dict(local)
+    if not remote:
+        return values
+    period = sum(report["period"] for report in remote)
+    updates = sum(report["updates"] for report in remote)
+
+    def total(key):
+        return sum(report[key] for report in remote)
+
+    def worst(key):
+        finite = [report[key] for report in remote if not np.isnan(report[key])]
+        return max(finite) if finite else float("nan")
+
+    values.update(
+        samples=total("samples"),
+        coalesced=total("coalesced"),
+        dropped=local["dropped"] + total("dropped"),
+        updates=updates,
+        update_time=sum(r["update_time"] * r["updates"] for r in remote)
+        / max(updates, 1),
+        max_update_time=max(report["max_update_time"] for report in remote),
+        upload_bytes=total("upload_bytes"),
+        fps=sum(r["fps"] * r["period"] for r in remote) / period if period else 0.0,
+        # Percentiles cannot be combined, keep the worst of each.
+        latency_p50=worst("latency_p50"),
+        latency_p90=worst("latency_p90"),
+        latency_p99=worst("latency_p99"),
+        staging_high_water=max(report["staging_high_water"] for report in remote),
+    )
+    return values
@@ -0,0 +1,134 @@
+from typing import Optional
+
+import numpy as np
+
+from vispy import scene
+from vispy.gloo import Texture2D
+from vispy.visuals import ImageVisual
+from vispy.visuals._scalable_textures import CPUScaledTexture2D
+from vispy.visuals._scalable_textures import GPUScaledTexture2D
+
+# Integer types uploaded as they are, as normalized GL textures.
+NATIVE_DTYPES = (np.dtype(np.uint8), np.dtype(np.uint16), np.dtype(np.int16))
+
+
+class _UploadCounter:
+    """Counts the bytes a texture sends to the GPU, after conversions."""
+
+    upload_bytes = 0
+
+    def _set_data(self, data, offset=None, copy=False):
+        # Texture data wider than 32 bits is downcast before the upload.
+        self.upload_bytes += data.size * min(np.dtype(data.dtype).itemsize, 4)
+        return super()._set_data(data, offset, copy)
+
+
+class _CPUTexture2D(_UploadCounter, CPUScaledTexture2D):
+    pass
+
+
+class _GPUTexture2D(_UploadCounter, GPUScaledTexture2D):
+    pass
+
+
+class IntegerTexture2D(_UploadCounter, GPUScaledTexture2D):
+    """Texture of uint8, uint16 or int16 values, normalized on the GPU.
+
+    GL has no normalized format for signed 16-bit values that vispy can
+    use, so int16 values are uploaded as uint16 offset by 32768 (their sign
+    bit flipped, a single pass into a reused buffer). Normalized over the
+    int16 range, both give the same values in the shader, so color limits
+    stay in the units of the data.
+    """
+
+    _texture_dtype_format = {
+        **GPUScaledTexture2D._texture_dtype_format,
+        np.int16: "r16",
+    }
+
+    def __init__(self, data=None, **texture_kwargs):
+        self._offset_binary: Optional[np.ndarray] = None
+        super().__init__(data, **texture_kwargs)
+
+    def _create_rep_array(self, data):
+        rep = super()._create_rep_array(data)
+        return rep.astype(np.uint16) if rep.dtype == np.int16 else rep
+
+    def scale_and_set_data(self, data, offset=None, copy=False):
+        if data.dtype != np.int16:
+            return super().scale_and_set_data(data, offset=offset, copy=copy)
+        self._reformat_if_necessary(data)
+        self._data_dtype = np.dtype(data.dtype)
+        self._clim = self._compute_clim(data)
+        if self._offset_binary is None or self._offset_binary.shape != data.shape:
+            self._offset_binary = np.empty(data.shape, np.uint16)
+        np.bitwise_xor(data.view(np.uint16), 0x8000, out=self._offset_binary)
+        return Texture2D.set_data(self, self._offset_binary, offset=offset)
+
+
+class NativeImageVisual(ImageVisual):
+    """Image that uploads integer frames in their own format.
+
+    uint8, uint16 and int16 images go to the GPU as they are, in a
+    normalized texture of the same width, and color limits and the
+    colormap are applied in the fragment shader. Vispy otherwise converts
+    them to float32 and scales them on the CPU, on every frame. Other
+    types use the default textures of `ImageVisual`.
+    """
+
+    def __init__(self, data=None, texture_format=None, **kwargs):
+        self._texture_format = texture_format
+        self._native = False
+        # Bytes uploaded by the textures replaced since the last call to
+        # take_upload_bytes.
+        self._upload_bytes = 0
+        super().__init__(data, texture_format=texture_format, **kwargs)
+
+    def take_upload_bytes(self) -> int:
+        """Bytes uploaded since the previous call."""
+        upload_bytes = self._upload_bytes + self._texture.upload_bytes
+        self._upload_bytes = 0
+        self._texture.upload_bytes = 0
+        return upload_bytes
+
+    def _init_texture(self, data, texture_format, **texture_kwargs):
+        native = (
+            self._texture_format is None
+            and data is not None
+            and np.dtype(data.dtype) in NATIVE_DTYPES
+        )
+        self._native = native
+        interpolation = "linear" if self._interpolation == "linear" else "nearest"
+        if native:
+            return IntegerTexture2D(
+                data,
+                internalformat="auto",
+                interpolation=interpolation,
+                **texture_kwargs,
+            )
+        # Like ImageVisual._init_texture, with textures counting uploads.
+        if texture_format is None:
+            return _CPUTexture2D(data, interpolation=interpolation, **texture_kwargs)
+        return _GPUTexture2D(
+            data,
+            internalformat=texture_format,
+            interpolation=interpolation,
+            **texture_kwargs,
+        )
+
+    def set_data(self, image, copy=False):
+        data = np.asarray(image)
+        native = self._texture_format is None and data.dtype in NATIVE_DTYPES
+        if native != self._native:
+            # Switch texture, keeping the color limits.
+            clim = self._texture.clim
+            self._upload_bytes += self._texture.upload_bytes
+            self._texture.delete()
+            self._texture = self._init_texture(data, self._texture_format)
+            self._texture.set_clim(clim)
+            self._need_interpolation_update = True
+            self._need_colortransform_update = True
+        super().set_data(data, copy=copy)
+
+
+NativeImage = scene.visuals.create_visual_node(NativeImageVisual)
@@ -0,0 +1,118 @@
+import numpy as np
+
+from vispy.scene import transforms
+from vispy.visuals.transforms._util import arg_to_array
+
+# Depth given to the gap slot of a ring buffer. The camera clips the scene at
+# +/- 1e6, so anything joined to this vertex is clipped right at its partner.
+GAP_DEPTH = 1e12
+
+
+class RollTransform(transforms.BaseTransform):
+    """Display a ring buffer of samples as a rolling window.
+
+    Samples are stored at fixed x positions ``slot * dt`` of a ring buffer
+    covering ``period``. The transform maps x to the age of the sample
+    relative to ``head``, the x position of the newest sample, so the ring
+    never needs to be shifted in memory.
+
+    The slot right after the newest sample is the write position of the
+    next update. It separates the newest sample from the oldest one, so it
+    is pushed out of the clip volume instead of being drawn.
+
+    Parameters
+    ----------
+    period : float
+        Length of the ring buffer in x units (``num_slots * dt``).
+    dt : float
+        Spacing between two slots in x units.
+    head : float
+        The x position of the newest sample.
+    """
+
+    glsl_map = """
+        vec4 roll_transform(vec4 pos) {
+            float age = mod($head - pos.x, $period);
+            float gap = step($period - 1.5 * $dt, age);
+            return vec4(age, pos.y, pos.z + gap * $gap_depth, pos.w);
+        }"""
+
+    glsl_imap = """
+        vec4 roll_transform(vec4 pos) {
+            return vec4(mod($head - pos.x, $period), pos.y, pos.z, pos.w);
+        }"""
+
+    Linear = False
+    Orthogonal = True
+    NonScaling = False
+    Isometric = False
+
+    def __init__(self, period=1.0, dt=1.0, head=0.0):
+        self._period = float(period)
+        self._dt = float(dt)
+        self._head = float(head)
+        super().__init__()
+
+    @property
+    def period(self):
+        """Length of the ring buffer in x units."""
+        return self._period
+
+    @period.setter
+    def period(self, period):
+        self._period = float(period)
+        self.shader_map()
+        self.shader_imap()
+        self.update()
+
+    @property
+    def dt(self):
+        """Spacing between two slots in x units."""
+        return self._dt
+
+    @dt.setter
+    def dt(self, dt):
+        self._dt = float(dt)
+        self.shader_map()
+        self.update()
+
+    @property
+    def head(self):
+        """The x position of the newest sample."""
+        return self._head
+
+    @head.setter
+    def head(self, head):
+        head = float(head)
+        if head == self._head:
+            return
+        self._head = head
+        self.shader_map()
+        self.shader_imap()
+        self.update()
+
+    @arg_to_array
+    def map(self, coords):
+        ret = np.array(coords, dtype=np.float64)
+        ret[..., 0] = np.mod(self._head - coords[..., 0], self._period)
+        return ret
+
+    @arg_to_array
+    def imap(self, coords):
+        ret = np.array(coords, dtype=np.float64)
+        ret[..., 0] = np.mod(self._head - coords[..., 0], self._period)
+        return ret
+
+    def shader_map(self):
+        fn = super().shader_map()
+        fn["head"] = self._head
+        fn["period"] = self._period
+        fn["dt"] = self._dt
+        fn["gap_depth"] = GAP_DEPTH
+        return fn
+
+    def shader_imap(self):
+        fn = super().shader_imap()
+        fn["head"] = self._head
+        fn["period"] = self._period
+        return fn
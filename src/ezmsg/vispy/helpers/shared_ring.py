@@ -0,0 +1,148 @@
+from multiprocessing import shared_memory
+from typing import Any
+from typing import Optional
+
+import numpy as np
+
+from ..frontends.relay import BUFFER_ALIGNMENT
+from ..frontends.relay import decode_frame
+from ..frontends.relay import encode_frame
+from .constants import BYTEORDER
+from .constants import UINT64_SIZE
+
+# Size of the counters in front of the ring.
+HEADER_SIZE = BUFFER_ALIGNMENT
+# Frame size marking the end of the ring; the next frame starts at offset 0.
+WRAP = 2**64 - 1
+
+
+def _aligned(size: int) -> int:
+    return -(-size // BUFFER_ALIGNMENT) * BUFFER_ALIGNMENT
+
+
+class _SharedMemory(shared_memory.SharedMemory):
+    def __del__(self):
+        try:
+            super().__del__()
+        except BufferError:
+            # The counters are still mapped; the memory is unmapped when
+            # the process exits.
+            pass
+
+
+class SharedFrameRing:
+    """Single producer, single consumer ring of relay frames in shared memory.
+
+    The producer copies each message, encoded like on the relay sockets
+    (see `encode_frame`), into the ring. The consumer, usually in another
+    process, copies each frame out of the ring once and decodes the copy,
+    so the arrays it reads own their memory: visuals keep references to
+    the arrays they receive, sometimes past the next draw. The consumer
+    calls `release` to let the producer reuse the memory of the frames
+    read.
+
+    A message that does not fit in the free space is dropped, so the
+    producer never waits for the consumer.
+
+    The ring starts with uint64 counters: the bytes written, the bytes
+    released and the messages dropped, followed by the capacity. Counters
+    only grow, and each is written by one side only.
+
+    Parameters
+    ----------
+    capacity : int
+        Size of the ring in bytes, rounded up to BUFFER_ALIGNMENT.
+        Ignored when attaching to an existing ring.
+    name : str, optional
+        Name of an existing ring to attach to. A new ring is created if
+        None.
+    """
+
+    def __init__(self, capacity: int = 64 * 2**20, name: Optional[str] = None):
+        if name is None:
+            capacity = _aligned(capacity)
+            self._shm = _SharedMemory(create=True, size=HEADER_SIZE + capacity)
+            self._owner = True
+        else:
+            self._shm = _SharedMemory(name=name)
+            self._owner = False
+        self._counters = np.ndarray((4,), dtype=np.uint64, buffer=self._shm.buf)
+        if self._owner:
+            self._counters[3] = capacity
+        # The mapping can be larger than requested, use the stored size.
+        self.capacity = int(self._counters[3])
+        self._data = self._shm.buf[HEADER_SIZE : HEADER_SIZE + self.capacity]
+        self._read = int(self._counters[1])
+
+    @property
+    def name(self) -> str:
+        """Name to attach to the ring from another process."""
+        return self._shm.name
+
+    @property
+    def dropped(self) -> int:
+        return int(self._counters[2])
+
+    @property
+    def used(self) -> int:
+        """Bytes written and not released yet."""
+        return int(self._counters[0] - self._counters[1])
+
+    def write(self, msg: Any) -> bool:
+        """Copy a message into the ring. Returns False if it was dropped."""
+        buffers = [memoryview(buffer).cast("B") for buffer in encode_frame(msg)]
+        size = _aligned(sum(buffer.nbytes for buffer in buffers))
+        head = int(self._counters[0])
+        offset = head % self.capacity
+        skip = self.capacity - offset if offset + size > self.capacity else 0
+        if skip + size > self.capacity - (head - int(self._counters[1])):
+            self._counters[2] += 1
+            return False
+        if skip:
+            self._data[offset : offset + UINT64_SIZE] = WRAP.to_bytes(
+                UINT64_SIZE, byteorder=BYTEORDER
+            )
+            head += skip
+            offset = 0
+        for buffer in buffers:
+            self._data[offset : offset + buffer.nbytes] = buffer
+            offset += buffer.nbytes
+        # Publish the frame only once it is complete.
+        self._counters[0] = head + size
+        return True
+
+    def read(self) -> list:
+        """Decode copies of the messages written since the previous read.
+
+        Their arrays are writable and do not depend on the ring, which can
+        be released right away.
+        """
+        messages = []
+        head = int(self._counters[0])
+        while self._read < head:
+            offset = self._read % self.capacity
+            size = int.from_bytes(
+                self._data[offset : offset + UINT64_SIZE], byteorder=BYTEORDER
+            )
+            if size == WRAP:
+                self._read += self.capacity - offset
+                continue
+            start = offset + UINT64_SIZE
+            messages.append(decode_frame(bytearray(self._data[start : start + size])))
+            self._read += _aligned(UINT64_SIZE + size)
+        return messages
+
+    def release(self):
+        """Let the producer reuse the memory of the messages read so far."""
+        self._counters[1] = self._read
+
+    def close(self):
+        """Unmap the ring, and remove it if this side created it."""
+        del self._counters
+        try:
+            self._data.release()
+            self._shm.close()
+        except BufferError:
+            pass
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+from .constants import TIMER_INTERVAL
+
+
+def staging_capacity(fs: float, interval: int = TIMER_INTERVAL) -> int:
+    """Samples arriving at ``fs`` within a few timer intervals (in ms)."""
+    return max(1, math.ceil(4 * fs * interval / 1000))
+
+
+class StagingBuffer:
+    """Preallocated buffer that collects samples between two frames.
+
+    Appending copies the samples into the buffer, growing it by doubling
+    when it is full, so appends are amortized O(1). The consumer reads the
+    contiguous `view` and then `clear`s the buffer, keeping its memory.
+
+    It is emptied by every update, so unlike a ring it never wraps, and
+    the update always gets one contiguous array to draw. Growing instead
+    of overwriting keeps every sample when the GUI stalls for longer than
+    the initial capacity; `high_water` and the ``staging_high_water``
+    metric of the plot tell how large it had to get.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of samples the buffer initially holds.
+    shape : tuple
+        Shape of a single sample.
+    dtype : np.dtype
+        Data type of the samples.
+    """
+
+    def __init__(self, capacity: int, shape: tuple = (), dtype=np.float64):
+        self._data = np.empty((max(capacity, 1),) + tuple(shape), dtype=dtype)
+        self._size = 0
+        # Most samples held at once since the buffer was created.
+        self.high_water = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[0]
+
+    @property
+    def shape(self) -> tuple:
+        """Shape of a single sample."""
+        return self._data.shape[1:]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._data.dtype
+
+    def append(self, data: np.ndarray):
+        """Copy samples of shape (time, *shape) to the end of the buffer."""
+        size = self._size + data.shape[0]
+        if size > self.capacity:
+            capacity = max(size, 2 * self.capacity)
+            grown = np.empty((capacity,) + self.shape, dtype=self.dtype)
+            grown[: self._size] = self._data[: self._size]
+            self._data = grown
+        self._data[self._size : size] = data
+        self._size = size
+        self.high_water = max(self.high_water, size)
+
+    def view(self) -> np.ndarray:
+        """Contiguous view of the samples, valid until the next append."""
+        return self._data[: self._size]
+
+    def clear(self):
+        self._size = 0
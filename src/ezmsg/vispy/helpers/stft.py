@@ -0,0 +1,99 @@
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StreamingSTFT:
+    """Short-time Fourier transform of a stream, one frame at a time.
+
+    The samples that the next frames overlap with are kept between calls,
+    so each call only computes the frames completed by its samples. Those
+    are transformed together, with one ``np.fft.rfft`` over a strided view
+    of the samples, for all channels at once.
+
+    Magnitudes are scaled like `vispy.util.fourier.stft`, divided by
+    ``n_fft``.
+
+    Parameters
+    ----------
+    n_fft : int
+        Number of samples per frame.
+    step : int | None
+        Samples between the starts of two frames, ``n_fft // 2`` if None.
+    window : str | None
+        ``"hann"``, or None for no window.
+    normalize : bool
+        Scale every frame to zero mean and unit variance across
+        frequencies.
+    color_scale : str
+        ``"log"`` for ``20 * log10(magnitude)``, or ``"linear"``.
+    """
+
+    def __init__(
+        self,
+        n_fft: int = 256,
+        step: Optional[int] = None,
+        window: Optional[str] = "hann",
+        normalize: bool = False,
+        color_scale: str = "log",
+    ):
+        if window not in ("hann", None):
+            raise ValueError('window must be "hann" or None')
+        if color_scale not in ("log", "linear"):
+            raise ValueError('color_scale must be "linear" or "log"')
+        self.n_fft = int(n_fft)
+        self.step = max(self.n_fft // 2, 1) if step is None else int(step)
+        self.normalize = normalize
+        self.color_scale = color_scale
+        self._window = np.hanning(self.n_fft) if window == "hann" else None
+        # Samples not consumed by a frame yet, (time, channels).
+        self._tail: Optional[np.ndarray] = None
+        # Samples to skip before the next frame, when step > n_fft.
+        self._skip = 0
+
+    @property
+    def n_freqs(self) -> int:
+        return self.n_fft // 2 + 1
+
+    def reset(self):
+        self._tail = None
+        self._skip = 0
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Add samples of shape (time,) or (time, channels).
+
+        Returns
+        -------
+        np.ndarray
+            float32 array of shape (frames, channels, n_freqs) holding the
+            frames completed by these samples, possibly none.
+        """
+        x = np.asarray(x)
+        if x.ndim == 1:
+            x = x[:, np.newaxis]
+        if self._skip:
+            skipped = min(self._skip, x.shape[0])
+            x = x[skipped:]
+            self._skip -= skipped
+        if self._tail is not None and self._tail.shape[1:] == x.shape[1:]:
+            x = np.concatenate((self._tail, x))
+        frames = (x.shape[0] - self.n_fft) // self.step + 1
+        if frames <= 0:
+            self._tail = x.copy()
+            return np.empty((0, x.shape[1], self.n_freqs), np.float32)
+
+        # (frames, channels, n_fft), without copying the samples.
+        windows = sliding_window_view(x, self.n_fft, axis=0)[:: self.step][:frames]
+        if self._window is not None:
+            windows = windows * self._window
+        data = np.abs(np.fft.rfft(windows, axis=-1)) / self.n_fft
+        if self.color_scale == "log":
+            with np.errstate(divide="ignore"):
+                data = 20 * np.log10(data)
+        if self.normalize:
+            data -= data.mean(axis=-1, keepdims=True)
+            data /= data.std(axis=-1, keepdims=True)
+        self._tail = x[frames * self.step :].copy()
+        self._skip = max(frames * self.step - x.shape[0], 0)
+        return data.astype(np.float32)
@@ -0,0 +1,299 @@
+from typing import Optional
+from typing import Union
+
+import numpy as np
+
+from vispy import gloo
+from vispy import scene
+from vispy.color import Color
+from vispy.visuals import Visual
+
+
+def merge_spans(spans: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge overlapping or adjacent (start, stop) spans."""
+    merged: list[tuple[int, int]] = []
+    for start, stop in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+class MultiChannelLineVisual(Visual):
+    """Batched streaming line visual that draws many channels from one buffer.
+
+    The samples of all channels live in a single (N, channels) array ``y``
+    that shares the x positions ``x`` of shape (N,). Each channel has an
+    offset, a scale, a visibility flag and a color, stored in a small
+    texture that the vertex shader reads. Changing them does not touch the
+    vertex buffers.
+
+    ``y`` is kept by reference: the caller writes new samples into it and
+    ``update_span`` uploads only the rows (samples) that changed. The rows
+    of ``y`` are contiguous, so a span is one upload for all channels.
+
+    On the GPU, ``y`` is a single buffer of (N,) rows that holds all
+    channels, and ``x`` is a buffer of (N,) that is shared by all of them.
+    Each channel is drawn from a strided view of the rows, without an index
+    buffer. This is 4 bytes per sample and channel, plus 4 bytes per sample
+    for ``x``. Hidden channels are not drawn at all.
+
+    Parameters
+    ----------
+    x : array | None
+        Array of shape (N,) with the x position of every sample.
+    y : array | None
+        Array of shape (N, channels) with the samples.
+    connect : str
+        "strip" joins every sample to the next one. "ring" also joins the
+        last sample to the first one, for ring buffers.
+    width : float
+        Width of the lines in px.
+    """
+
+    _shaders = {
+        "vertex": """
+            varying vec4 v_color;
+
+            void main(void) {
+                float u = ($channel + 0.5) / $n_channels;
+                // offset, scale, visible, mean
+                vec4 params = texture2D($channel_params, vec2(u, 0.25));
+                v_color = texture2D($channel_params, vec2(u, 0.75));
+                float y = ($y - params.w) * params.y + params.x;
+                gl_Position = $transform(vec4($x, y, 0.0, 1.0));
+            }
+        """,
+        "fragment": """
+            varying vec4 v_color;
+
+            void main() {
+                gl_FragColor = v_color;
+            }
+        """,
+    }
+
+    def __init__(
+        self,
+        x: Optional[np.ndarray] = None,
+        y: Optional[np.ndarray] = None,
+        connect: str = "strip",
+        width: float = 1.0,
+    ):
+        self._x: Optional[np.ndarray] = None
+        self._y: Optional[np.ndarray] = None
+        self._connect = connect
+        self._width = width
+        self._bounds = None
+        # Per channel rows of (offset, scale, visible, mean) and rgba color.
+        self._params = np.zeros((2, 0, 4), dtype=np.float32)
+        self._params_changed = False
+        # Pending uploads.
+        self._upload_static = False
+        self._spans: list[tuple[int, int]] = []
+        # Upload accounting, in bytes.
+        self._upload_bytes = 0
+        self.total_upload_bytes = 0
+
+        self._x_vbo = gloo.VertexBuffer()
+        self._y_vbo = gloo.VertexBuffer()
+        # One strided view of the rows of _y_vbo per channel.
+        self._y_views: list[gloo.buffer.DataBufferView] = []
+        self._row_dtype = np.dtype([])
+        self._params_tex = gloo.Texture2D(
+            shape=(2, 1, 4), internalformat="rgba32f", interpolation="nearest"
+        )
+
+        super().__init__(vcode=self._shaders["vertex"], fcode=self._shaders["fragment"])
+        self.set_gl_state("translucent")
+        self._draw_mode = "line_strip"
+        self.set_data(x=x, y=y)
+        self.freeze()
+
+    @property
+    def x(self) -> Optional[np.ndarray]:
+        return self._x
+
+    @property
+    def y(self) -> Optional[np.ndarray]:
+        return self._y
+
+    @property
+    def channels(self) -> int:
+        return self._params.shape[1]
+
+    @property
+    def width(self) -> float:
+        return self._width
+
+    @width.setter
+    def width(self, width: float):
+        self._width = width
+        self.update()
+
+    def set_data(
+        self,
+        x: Optional[np.ndarray] = None,
+        y: Optional[np.ndarray] = None,
+        connect: Optional[str] = None,
+    ):
+        """Set the sample positions, uploading all of them.
+
+        ``y`` is kept by reference (when it is already contiguous float32),
+        so later calls to ``update_span`` read from it. Changing the shape
+        of ``y`` resets the channel parameters.
+        """
+        if connect is not None:
+            self._connect = connect
+        if x is not None:
+            self._x = np.ascontiguousarray(x, dtype=np.float32)
+            self._upload_static = True
+        if y is not None:
+            if self._y is None or y.shape != self._y.shape:
+                self._upload_static = True
+            if y.shape[1] != self.channels:
+                params = np.zeros((2, y.shape[1], 4), dtype=np.float32)
+                params[0] = (0.0, 1.0, 1.0, 0.0)
+                params[1] = (0.5, 0.5, 0.5, 1.0)
+                self._params = params
+                self._params_changed = True
+            self._y = np.ascontiguousarray(y, dtype=np.float32)
+            self._spans = [(0, len(self._y))]
+        self._bounds = None
+        self.update()
+
+    def update_span(self, start: int, stop: int):
+        """Mark samples ``start`` to ``stop`` of ``y`` as changed."""
+        if self._y is None or stop <= start:
+            return
+        self._bounds = None
+        self._spans.append((start, stop))
+        self.update()
+
+    def set_channel(
+        self,
+        index: int,
+        offset: Optional[float] = None,
+        scale: Optional[float] = None,
+        visible: Optional[bool] = None,
+        mean: Optional[float] = None,
+        color: Optional[Union[Color, str, tuple]] = None,
+    ):
+        """Update the display parameters of one channel."""
+        params = self._params[0, index]
+        if offset is not None:
+            params[0] = offset
+        if scale is not None:
+            params[1] = scale
+        if visible is not None:
+            params[2] = float(visible)
+        if mean is not None:
+            params[3] = mean
+        if color is not None:
+            self._params[1, index] = Color(color).rgba
+        self._params_changed = True
+        self._bounds = None
+        self.update()
+
+    def set_mean(self, mean: np.ndarray):
+        """Set the value subtracted from every channel before scaling."""
+        mean = np.asarray(mean, dtype=np.float32)
+        if np.array_equal(self._params[0, :, 3], mean):
+            return
+        self._params[0, :, 3] = mean
+        self._params_changed = True
+        self._bounds = None
+        self.update()
+
+    def channel_param(self, index: int, name: str) -> float:
+        """Get the "offset", "scale", "visible" or "mean" of one channel."""
+        return float(
+            self._params[0, index, ("offset", "scale", "visible", "mean").index(name)]
+        )
+
+    def channel_color(self, index: int) -> Color:
+        return Color(self._params[1, index])
+
+    def _rows(self, rows: np.ndarray) -> np.ndarray:
+        # A row of all channels as one structured item, without a copy.
+        if self._row_dtype.itemsize != rows.strides[0]:
+            # Fields are structs themselves, so their views have a GLSL type.
+            sample = [("f0", np.float32)]
+            self._row_dtype = np.dtype(
+                [(f"c{channel}", sample) for channel in range(rows.shape[1])]
+            )
+        return rows.view(self._row_dtype).reshape(-1)
+
+    def _upload(self):
+        nbytes = 0
+        if self._upload_static:
+            num_slots = len(self._y)
+            x = self._x[:num_slots]
+            rows = self._rows(self._y)
+            self._x_vbo.set_data(x)
+            self._y_vbo.set_data(rows)
+            self._y_views = [self._y_vbo[name] for name in rows.dtype.names]
+            self._program.vert["x"] = self._x_vbo
+            nbytes += x.nbytes + self._y.nbytes
+            self._upload_static = False
+        else:
+            for start, stop in merge_spans(self._spans):
+                span = self._rows(self._y[start:stop])
+                self._y_vbo.set_subdata(span, offset=start)
+                nbytes += span.nbytes
+        self._spans = []
+        if self._params_changed:
+            self._params_tex.set_data(self._params)
+            self._program.vert["channel_params"] = self._params_tex
+            self._program.vert["n_channels"] = float(self.channels)
+            nbytes += self._params.nbytes
+            self._params_changed = False
+        self._upload_bytes += nbytes
+        self.total_upload_bytes += nbytes
+
+    def take_upload_bytes(self) -> int:
+        """Bytes uploaded to the GPU since the last call."""
+        nbytes = self._upload_bytes
+        self._upload_bytes = 0
+        return nbytes
+
+    def _prepare_transforms(self, view):
+        view.view_program.vert["transform"] = view.transforms.get_transform()
+
+    def _prepare_draw(self, view):
+        if self._x is None or self._y is None or self._y.size == 0:
+            return False
+        if len(self._x) < len(self._y):
+            return False
+        self._upload()
+        width = self.transforms.pixel_scale * self._width
+        self.update_gl_state(line_width=max(width, 1.0))
+
+    def draw(self):
+        if not self.visible:
+            return
+        if self._prepare_draw(view=self) is False:
+            return
+        self._configure_gl_state()
+        # "ring" also joins the last sample to the first one.
+        mode = "line_loop" if self._connect == "ring" else "line_strip"
+        for channel in np.flatnonzero(self._params[0, :, 2] >= 0.5):
+            self._program.vert["channel"] = float(channel)
+            self._program.vert["y"] = self._y_views[channel]
+            self._program.draw(mode)
+
+    def _compute_bounds(self, axis, view):
+        if self._x is None or self._y is None or axis > 1:
+            return None
+        if self._bounds is None:
+            offset, scale, _, mean = self._params[0].T
+            # Per channel extremes, the scale may flip them.
+            low = (self._y.min(axis=0) - mean) * scale + offset
+            high = (self._y.max(axis=0) - mean) * scale + offset
+            y = (np.minimum(low, high).min(), np.maximum(low, high).max())
+            self._bounds = [(self._x.min(), self._x.max()), y]
+        return self._bounds[axis]
+
+
+MultiChannelLine = scene.visuals.create_visual_node(MultiChannelLineVisual)
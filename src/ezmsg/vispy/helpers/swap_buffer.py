@@ -0,0 +1,112 @@
+import time
+from collections import deque
+from typing import Callable
+from typing import Generic
+from typing import Optional
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+def update_merge(into: dict, newer: dict):
+    """Default merge: values of the newer buffer replace the older ones."""
+    into.update(newer)
+
+
+def clear_reset(buffer: dict):
+    """Default reset: empty the buffer."""
+    buffer.clear()
+
+
+class SwapBuffer(Generic[T]):
+    """Single producer, single consumer buffer swap that never blocks.
+
+    The producer fills `back` and calls `publish`, the consumer takes the
+    published buffer with `acquire` and gives it back with `release`. At
+    most one buffer is published at a time; publishing while the consumer
+    has not taken the previous one merges the new contents into it.
+
+    Buffers are passed through `collections.deque` appends and pops, which
+    are atomic, so neither side ever waits for a lock held by the other.
+    This is what lets the ezmsg event loop thread and the Qt thread share
+    data without stalling each other. If the consumer looks while the
+    producer is merging, it finds nothing and gets the merged buffer on its
+    next call.
+
+    Parameters
+    ----------
+    factory : Callable[[], T]
+        Creates an empty buffer.
+    merge : Callable[[T, T], None]
+        Merges a newer buffer into an older, unconsumed one. The newer
+        buffer is reset afterwards, so merge may move objects out of it.
+    reset : Callable[[T], None]
+        Empties a buffer so it can be reused.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], T] = dict,
+        merge: Callable[[T, T], None] = update_merge,
+        reset: Callable[[T], None] = clear_reset,
+    ):
+        self._factory = factory
+        self._merge = merge
+        self._reset = reset
+        self._ready: deque = deque()
+        self._free: deque = deque([factory(), factory()])
+        self._merging = False
+        self.back: T = factory()
+
+        # Publishes that merged into a buffer the consumer had not taken.
+        self.producer_contention = 0
+        # Acquires that found nothing while the producer was merging.
+        self.consumer_contention = 0
+        # Time spent in publish and acquire/release, in seconds.
+        self.producer_wait = 0.0
+        self.consumer_wait = 0.0
+        # Buffers allocated because none was free.
+        self.allocations = 0
+
+    def publish(self):
+        """Make the contents of `back` available to the consumer."""
+        start = time.perf_counter()
+        self._merging = True
+        try:
+            pending = self._ready.popleft()
+        except IndexError:
+            pending = None
+        if pending is not None:
+            # The consumer has not taken the previous buffer, merge into it.
+            self.producer_contention += 1
+            self._merge(pending, self.back)
+            self._reset(self.back)
+            self._ready.append(pending)
+        else:
+            self._ready.append(self.back)
+            try:
+                self.back = self._free.popleft()
+            except IndexError:
+                self.allocations += 1
+                self.back = self._factory()
+        self._merging = False
+        self.producer_wait += time.perf_counter() - start
+
+    def acquire(self) -> Optional[T]:
+        """Take the published buffer, or None if there is nothing new."""
+        start = time.perf_counter()
+        try:
+            buffer = self._ready.popleft()
+        except IndexError:
+            buffer = None
+            if self._merging:
+                self.consumer_contention += 1
+        self.consumer_wait += time.perf_counter() - start
+        return buffer
+
+    def release(self, buffer: T):
+        """Give a buffer taken with `acquire` back to the producer."""
+        start = time.perf_counter()
+        self._reset(buffer)
+        self._free.append(buffer)
+        self.consumer_wait += time.perf_counter() - start
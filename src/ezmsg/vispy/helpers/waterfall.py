@@ -0,0 +1,144 @@
+import numpy as np
+
+from vispy import scene
+from vispy.visuals import ImageVisual
+from vispy.visuals.shaders import Function
+
+# Wraps the texture lookup of ImageVisual, %s is the scrolling component.
+_SCROLL_LOOKUP = """
+    vec4 scrolled_lookup(vec2 texcoord) {
+        if (texcoord.%s >= 0.0 && texcoord.%s <= 1.0) {
+            texcoord.%s = fract(texcoord.%s + $offset);
+        }
+        return $lookup(texcoord);
+    }"""
+
+
+class WaterfallImageVisual(ImageVisual):
+    """Image scrolling through the newest columns, or rows, of a stream.
+
+    The texture is a ring of ``length`` columns. ``append`` uploads only
+    the new columns, into the slots of the oldest ones, and the fragment
+    shader shifts the texture coordinates by the position of the oldest
+    column so the image reads oldest to newest. History is never copied,
+    neither in Python nor on the GPU.
+
+    Values are uploaded as 32-bit floats and scaled on the GPU. The color
+    limits cannot be computed from the texture, so ``clim="auto"`` only
+    applies the range of the first values appended; `ImageWidget` keeps
+    them up to date with an `AutoClim`. Slots not written yet are NaN and
+    not drawn.
+
+    Parameters
+    ----------
+    length : int
+        Number of columns, or rows, kept.
+    axis : int
+        1 to append columns, scrolling horizontally, 0 to append rows.
+    """
+
+    def __init__(self, length: int, axis: int = 1, clim="auto", **kwargs):
+        if axis not in (0, 1):
+            raise ValueError("axis must be 0 (rows) or 1 (columns)")
+        self.length = length
+        self.axis = axis
+        # Slot the next column is written to, holding the oldest one.
+        self.head = 0
+        self._auto_clim = True
+        # Blocks appended while a full upload of the texture is pending.
+        self._pending: list[tuple[int, np.ndarray]] = []
+        self._upload_bytes = 0
+        component = "yx"[axis]
+        self._scroll = Function(_SCROLL_LOOKUP % ((component,) * 4))
+        self._scroll["offset"] = 0.0
+        # GPU scaling needs data to pick a texture format, use a float pixel.
+        kwargs["texture_format"] = "auto"
+        super().__init__(np.full((1, 1), np.nan, np.float32), **kwargs)
+        self.clim = clim
+
+    @property
+    def clim(self):
+        return ImageVisual.clim.fget(self)
+
+    @clim.setter
+    def clim(self, clim):
+        self._auto_clim = isinstance(clim, str) and clim == "auto"
+        if not self._auto_clim:
+            ImageVisual.clim.fset(self, clim)
+
+    def take_upload_bytes(self) -> int:
+        """Bytes uploaded since the previous call."""
+        upload_bytes, self._upload_bytes = self._upload_bytes, 0
+        return upload_bytes
+
+    def _allocate(self, shape: tuple[int, int]):
+        # Never written; it gives the texture its size on the first draw.
+        self._data = np.broadcast_to(np.float32(np.nan), shape)
+        self._need_texture_upload = True
+        self._need_vertex_update = True
+        self._need_interpolation_update = True
+        self._pending.clear()
+        if self._auto_clim:
+            # Until values arrive, NaN slots are not drawn anyway.
+            ImageVisual.clim.fset(self, (0.0, 1.0))
+        self.head = 0
+        self._scroll["offset"] = 0.0
+
+    def append(self, block: np.ndarray):
+        """Add columns of shape (rows, n), or rows of shape (n, columns)."""
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 1:
+            block = np.expand_dims(block, self.axis)
+        width = block.shape[1 - self.axis]
+        shape = [width, width]
+        shape[self.axis] = self.length
+        if self._data is None or self._data.shape != tuple(shape):
+            self._allocate(tuple(shape))
+        count = block.shape[self.axis]
+        if count == 0:
+            return
+        if count > self.length:
+            block = block[:, -self.length :] if self.axis else block[-self.length :]
+            count = self.length
+
+        if self._auto_clim:
+            finite = block[np.isfinite(block)]
+            if finite.size:
+                high = max(float(finite.max()), float(finite.min()) + 1e-12)
+                self.clim = (float(finite.min()), high)
+
+        # Write up to the end of the ring, then wrap to its start.
+        first = min(count, self.length - self.head)
+        if self.axis:
+            parts = [(self.head, block[:, :first]), (0, block[:, first:])]
+        else:
+            parts = [(self.head, block[:first]), (0, block[first:])]
+        for slot, part in parts:
+            if part.size:
+                self._write(slot, np.ascontiguousarray(part))
+        self.head = (self.head + count) % self.length
+        self._scroll["offset"] = self.head / self.length
+        self.update()
+
+    def _write(self, slot: int, part: np.ndarray):
+        if self._need_texture_upload:
+            # The first draw uploads the whole texture, write after it.
+            self._pending.append((slot, part.copy()))
+            return
+        offset = (0, slot) if self.axis else (slot, 0)
+        self._texture.set_data(part, offset=offset)
+        self._upload_bytes += part.nbytes
+
+    def _build_texture(self):
+        super()._build_texture()
+        for slot, part in self._pending:
+            self._write(slot, part)
+        self._pending.clear()
+
+    def _build_interpolation(self):
+        super()._build_interpolation()
+        self._scroll["lookup"] = self._data_lookup_fn
+        self.shared_program.frag["get_data"] = self._scroll
+
+
+WaterfallImage = scene.visuals.create_visual_node(WaterfallImageVisual)
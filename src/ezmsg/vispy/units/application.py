@@ -1,21 +1,30 @@
 import asyncio
 import logging
-import pickle
+import multiprocessing
 import signal
 import socket
 from collections.abc import AsyncGenerator
+from dataclasses import dataclass
 from dataclasses import field
 from typing import Any
 from typing import Optional
+from typing import Union
 
-from qtpy import QtCore
 from qtpy import QtWidgets
 
 import ezmsg.core as ez
 
+from ..frontends.gui_process import GuiProcessSpec
+from ..frontends.gui_process import RemoteVisual
+from ..frontends.gui_process import run_gui_process
 from ..frontends.main_window import EzWindowMeta
-from ..helpers.constants import BYTEORDER
-from ..helpers.constants import UINT64_SIZE
+from ..frontends.relay import decode_frame
+from ..frontends.relay import FrameStreamReader
+from ..frontends.relay import FrameWriter
+from ..frontends.relay import InProcessRelay
+from ..helpers.constants import TIMER_INTERVAL
+from ..helpers.frame_scheduler import FrameScheduler
+from ..helpers.shared_ring import SharedFrameRing
 from .plot_vis import PlotVis
 
 logger = logging.getLogger(__name__)
@@ -25,6 +34,7 @@ class SimpleApplicationSettings(ez.Settings):
     title: str
     width: int
     height: int
+    # Sets the minimum time between two frames (ms) of the FrameScheduler.
     external_timer: bool
     external_timer_interval: int = 33
     ui_file: Optional[str] = None
@@ -32,7 +42,7 @@ class SimpleApplicationSettings(ez.Settings):
 
 class SimpleApplicationState(ez.State):
     app: Optional[QtWidgets.QApplication]
-    timer: Optional[QtCore.QTimer]
+    scheduler: Optional[FrameScheduler]
     win: Optional[QtWidgets.QMainWindow]
 
 
@@ -48,7 +58,7 @@ class SimpleApplication(ez.Unit):
 
     def initialize(self):
         self.STATE.app = None
-        self.STATE.timer = None
+        self.STATE.scheduler = None
         self.STATE.win = None
 
     @ez.main
@@ -56,6 +66,7 @@ class SimpleApplication(ez.Unit):
         # Setup signal handling for Ctrl-C
         signal.signal(signal.SIGINT, signal_handler)
         self.STATE.app = QtWidgets.QApplication([])
+        self.STATE.scheduler = FrameScheduler.instance()
 
         # Window
         self.STATE.win = QtWidgets.QMainWindow()
@@ -69,19 +80,14 @@ class SimpleApplication(ez.Unit):
         self.STATE.win.setWindowTitle(self.SETTINGS.title)
 
         if self.SETTINGS.external_timer is True:
-            self.STATE.timer = QtCore.QTimer()
-            self.STATE.timer.setInterval(self.SETTINGS.external_timer_interval)
-            self.STATE.timer.timeout.connect(self.update)
-            self.STATE.timer.start()
+            self.STATE.scheduler.interval = self.SETTINGS.external_timer_interval
 
         self.STATE.win.show()
         self.STATE.app.exec()
 
-        if self.SETTINGS.external_timer is True and self.STATE.timer is not None:
-            self.STATE.timer.stop()
-        else:
-            for visual in self.visuals:
-                visual.STATE.timer.stop()
+        for visual in self.visuals:
+            visual.stop()
+        self.STATE.scheduler.close()
 
         self.STATE.app.quit()
         raise ez.NormalTermination
@@ -95,23 +101,57 @@ class SimpleApplication(ez.Unit):
             visual.update()
 
 
+@dataclass
+class RelayMetricsMessage:
+    """Traffic of the response relay over the last ``period`` seconds.
+
+    A growing ``queue_depth`` means the frontend reads responses slower
+    than they are sent.
+    """
+
+    period: float
+    messages: int
+    # Vectored writes to the socket, and bytes written by them.
+    writes: int
+    bytes: int
+    # Frames not fully written at the end of the period, and their size.
+    queue_depth: int
+    queued_bytes: int
+    max_queue_depth: int
+
+
 class ApplicationSettings(ez.Settings):
     window: EzWindowMeta
+    # Sets the minimum time between two frames (ms) of the FrameScheduler.
     external_timer: bool
     external_timer_interval: int = 33
     width: int = 640
     height: int = 640
     kwargs: dict = field(default_factory=dict)
+    # Hand commands and responses to the window by reference instead of
+    # pickling them through sockets. Senders must not modify a message
+    # after sending it.
+    in_process: bool = False
+    # Seconds between two relay metrics messages, 0 disables them. There
+    # are none with in_process.
+    metrics_interval: float = 1.0
+    # Run the window and visuals in a child process, so rendering and the
+    # ezmsg subscribers do not share a GIL. Visuals receive their messages
+    # through shared memory rings of ring_size bytes each.
+    out_of_process: bool = False
+    ring_size: int = 64 * 2**20
 
 
 class ApplicationState(ez.State):
     app: Optional[QtWidgets.QApplication]
-    timer: Optional[QtCore.QTimer]
+    scheduler: Optional[FrameScheduler]
     win: Optional[QtWidgets.QMainWindow]
-    command_socket: socket.SocketType
-    response_socket: socket.SocketType
-    command_relay_socket: socket.SocketType
-    response_relay_socket: socket.SocketType
+    command_socket: Union[socket.SocketType, InProcessRelay]
+    response_socket: Union[socket.SocketType, InProcessRelay]
+    command_relay_socket: Union[socket.SocketType, InProcessRelay]
+    response_relay_socket: Union[socket.SocketType, InProcessRelay]
+    response_writer: Optional[FrameWriter]
+    rings: list[SharedFrameRing]
 
 
 class Application(ez.Unit):
@@ -121,6 +161,7 @@ class Application(ez.Unit):
 
     INPUT = ez.InputStream(Any)
     OUTPUT = ez.OutputStream(Any)
+    METRICS_OUTPUT = ez.OutputStream(RelayMetricsMessage)
 
     SETTINGS = ApplicationSettings
     STATE = ApplicationState
@@ -129,8 +170,21 @@ class Application(ez.Unit):
 
     def initialize(self) -> None:
         self.STATE.app = None
-        self.STATE.timer = None
+        self.STATE.scheduler = None
         self.STATE.win = None
+        self.STATE.response_writer = None
+        self.STATE.rings = []
+        if self.SETTINGS.in_process and self.SETTINGS.out_of_process:
+            raise ValueError("in_process and out_of_process are exclusive")
+        if self.SETTINGS.in_process:
+            # Each relay is used from both ends, by the window and by ezmsg.
+            command_relay = InProcessRelay()
+            self.STATE.command_socket = command_relay
+            self.STATE.command_relay_socket = command_relay
+            response_relay = InProcessRelay()
+            self.STATE.response_relay_socket = response_relay
+            self.STATE.response_socket = response_relay
+            return
         # Setup command relay which forwards messages into ezmsg
         self.STATE.command_socket, self.STATE.command_relay_socket = socket.socketpair()
         # Setup response relay which forwards messages to the frontend.
@@ -141,37 +195,109 @@ class Application(ez.Unit):
 
     @ez.subscriber(INPUT)
     async def on_response(self, message: Any) -> None:
-        raw = pickle.dumps(message)
-        raw_size = len(raw).to_bytes(UINT64_SIZE, byteorder=BYTEORDER, signed=False)
-        self.STATE.response_relay_socket.send(raw_size)
-        self.STATE.response_relay_socket.send(raw)
+        if isinstance(self.STATE.response_relay_socket, InProcessRelay):
+            self.STATE.response_relay_socket.send(message)
+            return
+        if self.STATE.response_writer is None:
+            self.STATE.response_writer = FrameWriter(
+                self.STATE.response_relay_socket, asyncio.get_running_loop()
+            )
+        self.STATE.response_writer.send(message)
+
+    @ez.publisher(METRICS_OUTPUT)
+    async def publish_metrics(self) -> AsyncGenerator:
+        if self.SETTINGS.in_process or self.SETTINGS.metrics_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.SETTINGS.metrics_interval)
+            if self.STATE.response_writer is None:
+                continue
+            values = self.STATE.response_writer.report()
+            yield self.METRICS_OUTPUT, RelayMetricsMessage(**values)
 
     @ez.publisher(OUTPUT)
     async def on_command(self) -> AsyncGenerator:
+        if isinstance(self.STATE.command_relay_socket, InProcessRelay):
+            async for message in self._in_process_commands():
+                yield self.OUTPUT, message
+            return
+
         command_relay_reader, writer = await asyncio.open_connection(
             sock=self.STATE.command_relay_socket
         )
 
+        frames = FrameStreamReader(command_relay_reader)
         try:
             while True:
-                raw_size_bytes = await command_relay_reader.read(UINT64_SIZE)
-                raw_size = int.from_bytes(
-                    raw_size_bytes, byteorder=BYTEORDER, signed=False
-                )
-                raw = await command_relay_reader.read(raw_size)
-                if len(raw) == 0:
+                batch = await frames.read_batch()
+                if not batch:
                     break
-                message = pickle.loads(raw)
-                yield self.OUTPUT, message
+                # Decode the whole batch before publishing any of it.
+                messages = [decode_frame(raw) for raw in batch]
+                for message in messages:
+                    yield self.OUTPUT, message
         finally:
             writer.close()
             await writer.wait_closed()
 
+    async def _in_process_commands(self) -> AsyncGenerator:
+        relay = self.STATE.command_relay_socket
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        loop.add_reader(relay.fileno(), readable.set)
+        try:
+            while True:
+                await readable.wait()
+                readable.clear()
+                for message in relay.receive():
+                    yield message
+        finally:
+            loop.remove_reader(relay.fileno())
+
+    def _run_gui_process(self) -> None:
+        visuals = {}
+        for name, visual in self.visuals.items():
+            ring = SharedFrameRing(self.SETTINGS.ring_size)
+            self.STATE.rings.append(ring)
+            link, gui_link = socket.socketpair()
+            visual.attach_remote(ring, link)
+            visuals[name] = RemoteVisual(
+                type(visual), visual.SETTINGS, ring.name, gui_link
+            )
+        interval = TIMER_INTERVAL
+        if self.SETTINGS.external_timer:
+            interval = self.SETTINGS.external_timer_interval
+        spec = GuiProcessSpec(
+            window=self.SETTINGS.window,
+            command_socket=self.STATE.command_socket,
+            response_socket=self.STATE.response_socket,
+            width=self.SETTINGS.width,
+            height=self.SETTINGS.height,
+            interval=interval,
+            kwargs=self.SETTINGS.kwargs,
+            visuals=visuals,
+        )
+        # Forking would copy the threads and event loop of ezmsg.
+        context = multiprocessing.get_context("spawn")
+        process = context.Process(target=run_gui_process, args=(spec,), daemon=True)
+        process.start()
+        process.join()
+
+        for visual in self.visuals.values():
+            visual.stop()
+        for remote in visuals.values():
+            remote.link.close()
+
     @ez.main
     def run_visuals(self) -> None:
+        if self.SETTINGS.out_of_process:
+            self._run_gui_process()
+            raise ez.NormalTermination
+
         # Setup signal handling for Ctrl-C
         signal.signal(signal.SIGINT, signal_handler)
         self.STATE.app = QtWidgets.QApplication([])
+        self.STATE.scheduler = FrameScheduler.instance()
 
         # Window
         self.STATE.win = self.SETTINGS.window(
@@ -188,19 +314,14 @@ class Application(ez.Unit):
         self.STATE.win.add_visual_widgets(widgets)
 
         if self.SETTINGS.external_timer:
-            self.STATE.timer = QtCore.QTimer()
-            self.STATE.timer.setInterval(self.SETTINGS.external_timer_interval)
-            self.STATE.timer.timeout.connect(self.update)
-            self.STATE.timer.start()
+            self.STATE.scheduler.interval = self.SETTINGS.external_timer_interval
 
         self.STATE.win.show()
         self.STATE.app.exec()
 
-        if self.SETTINGS.external_timer and self.STATE.timer is not None:
-            self.STATE.timer.stop()
-        else:
-            for visual in self.visuals.values():
-                visual.STATE.timer.stop()
+        for visual in self.visuals.values():
+            visual.stop()
+        self.STATE.scheduler.close()
         self.STATE.app.quit()
         raise ez.NormalTermination
 
@@ -211,6 +332,8 @@ class Application(ez.Unit):
         self.STATE.command_relay_socket.close()
         self.STATE.response_socket.close()
         self.STATE.response_relay_socket.close()
+        for ring in self.STATE.rings:
+            ring.close()
 
     def update(self) -> None:
         for visual in self.visuals.values():
@@ -16,7 +16,7 @@ class ComplexImageVisState(PlotVisState):
     data: np.ndarray = None
     clim: Optional[Union[tuple[float, float], str]] = "auto"
     cmap: Optional[str] = "grays"
-    _update: bool = False
+    complex_mode: Optional[str] = "magnitude"
 
 
 class ComplexImageVisSettings(PlotVisSettings):
@@ -24,6 +24,11 @@ class ComplexImageVisSettings(PlotVisSettings):
     clim: Union[tuple[float, float], str] = "auto"
     cmap: str = "grays"
     aspect: float = None
+    # "real", "imaginary", "magnitude" or "phase", computed on the GPU.
+    complex_mode: str = "magnitude"
+    # Show 20 * log10 of the values, except the phase.
+    log_scale: bool = False
+    clim_percentiles: tuple[float, float] = (1.0, 99.0)
 
 
 class ComplexImageVis(PlotVis):
@@ -39,17 +44,28 @@ class ComplexImageVis(PlotVis):
     def initialize(self):
         self.STATE.clim = self.SETTINGS.clim
         self.STATE.cmap = self.SETTINGS.cmap
+        self.STATE.complex_mode = self.SETTINGS.complex_mode
 
     @ez.subscriber(INPUT)
     async def got_message(self, message: Any) -> None:
+        if self.forward(message):
+            return
         if self.STATE.widget is not None:
             if hasattr(message, self.SETTINGS.data_attr):
-                self.STATE.data = getattr(message, self.SETTINGS.data_attr)
-                self.STATE._update = True
+                data = getattr(message, self.SETTINGS.data_attr)
+                self.STATE.swap.back["data"] = data
+                self.STATE.metrics.receive(1)
+                self.STATE.swap.publish()
+                self.mark_dirty()
 
     def update(self):
-        if self.STATE._update:
+        buffer = self.STATE.swap.acquire()
+        if buffer is not None:
+            self.STATE.data = buffer["data"]
+            self.STATE.swap.release(buffer)
             self.STATE.widget.update(
-                data=self.STATE.data, clim=self.STATE.clim, cmap=self.STATE.cmap
+                data=self.STATE.data,
+                clim=self.STATE.clim,
+                cmap=self.STATE.cmap,
+                complex_mode=self.STATE.complex_mode,
             )
-            self.STATE._update = False
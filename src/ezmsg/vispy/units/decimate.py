@@ -0,0 +1,109 @@
+import logging
+from collections.abc import AsyncGenerator
+from dataclasses import replace
+from typing import Optional
+
+import numpy as np
+
+import ezmsg.core as ez
+from ezmsg.util.messages.axisarray import AxisArray
+
+from ..helpers.decimation import LTTBDecimator
+from ..helpers.decimation import MinMaxDecimator
+from ..helpers.decimation import StreamDecimator
+from .plot_vis import DisplayDemandMessage
+
+logger = logging.getLogger(__name__)
+
+DECIMATORS = {"minmax": MinMaxDecimator, "lttb": LTTBDecimator}
+
+
+class DecimateSettings(ez.Settings):
+    # Points per second and channel sent downstream.
+    points_per_second: float = 2000.0
+    # "minmax" keeps the min and max of every bucket of samples, "lttb"
+    # the most significant sample of every bucket.
+    method: str = "minmax"
+    axis: str = "time"
+
+
+class DecimateState(ez.State):
+    decimator: Optional[StreamDecimator] = None
+    # Sample period, shape and dtype of the stream the decimator is for.
+    template: Optional[tuple] = None
+    # Messages are dropped while no plot shows them.
+    open: bool = True
+
+
+class Decimate(ez.Unit):
+    """Reduce AxisArrays to what a plot can draw, before they reach it.
+
+    Samples along ``axis`` are reduced in buckets sized so the output has
+    about ``points_per_second`` points per second, for all channels at
+    once. Samples of a bucket split across messages are reduced together,
+    so the output is the same however the input is split. Streams slower
+    than ``points_per_second`` are passed through.
+
+    Connect the ``EVS_OUTPUT`` of the plot to ``INPUT_DEMAND`` to stop
+    sending data while the plot is hidden.
+    """
+
+    SETTINGS = DecimateSettings
+    STATE = DecimateState
+
+    INPUT_SIGNAL = ez.InputStream(AxisArray)
+    INPUT_DEMAND = ez.InputStream(DisplayDemandMessage)
+    OUTPUT_SIGNAL = ez.OutputStream(AxisArray)
+
+    def initialize(self):
+        if self.SETTINGS.method not in DECIMATORS:
+            raise ValueError(
+                f"Unknown decimation method {self.SETTINGS.method!r}, "
+                f"expected one of {list(DECIMATORS)}"
+            )
+
+    @ez.subscriber(INPUT_DEMAND)
+    async def on_demand(self, message: DisplayDemandMessage) -> None:
+        self.STATE.open = message.open
+        if not message.open:
+            # Start over when shown again, the stream has a gap.
+            self.STATE.decimator = None
+
+    @ez.subscriber(INPUT_SIGNAL)
+    @ez.publisher(OUTPUT_SIGNAL)
+    async def on_signal(self, message: AxisArray) -> AsyncGenerator:
+        if not self.STATE.open:
+            return
+        axis_idx = message.get_axis_idx(self.SETTINGS.axis)
+        axis = message.get_axis(self.SETTINGS.axis)
+        decimator_type = DECIMATORS[self.SETTINGS.method]
+        bucket = round(
+            decimator_type.points_per_bucket
+            / (axis.gain * self.SETTINGS.points_per_second)
+        )
+        if bucket <= decimator_type.points_per_bucket:
+            yield self.OUTPUT_SIGNAL, message
+            return
+
+        # Reduce along the first axis, all other axes are channels.
+        data = np.moveaxis(message.data, axis_idx, 0)
+        template = (axis.gain, data.shape[1:], data.dtype)
+        if self.STATE.decimator is None or self.STATE.template != template:
+            self.STATE.decimator = decimator_type(bucket)
+            self.STATE.template = template
+        decimator = self.STATE.decimator
+
+        # The output starts with the samples kept from previous messages.
+        offset = axis.offset - decimator.pending * axis.gain
+        reduced = decimator.process(data)
+        if reduced.shape[0] == 0:
+            return
+        gain = axis.gain * bucket / decimator.points_per_bucket
+        axes = {
+            **message.axes,
+            self.SETTINGS.axis: replace(axis, gain=gain, offset=offset),
+        }
+        yield (
+            self.OUTPUT_SIGNAL,
+            replace(message, data=np.moveaxis(reduced, 0, axis_idx), axes=axes),
+        )
@@ -29,7 +29,6 @@ class HistogramVisSettings(PlotVisSettings):
 class HistogramVisState(PlotVisState):
     data: np.ndarray = np.array([])
     bins: Optional[int] = None
-    _update: bool = False
 
 
 class HistogramVis(PlotVis):
@@ -44,25 +43,35 @@ class HistogramVis(PlotVis):
 
     @ez.subscriber(INPUT)
     async def got_message(self, message: Any) -> None:
+        if self.forward(message):
+            return
         if self.STATE.widget is not None:
+            back = self.STATE.swap.back
             if type(message) is AxisArray and "bins" in message.dims:
-                self.STATE.data = message.data
-                self.STATE.bins = compute_bins_from_axis(message)
-                self.STATE._update = True
+                back["data"] = message.data
+                back["bins"] = compute_bins_from_axis(message)
+                self.STATE.metrics.receive(1)
+                self.STATE.swap.publish()
+                self.mark_dirty()
             elif (
                 self.SETTINGS.data_attr is not None
                 and self.SETTINGS.bins_attr is not None
                 and hasattr(message, self.SETTINGS.data_attr)
                 and hasattr(message, self.SETTINGS.bins_attr)
             ):
-                self.STATE.data = getattr(message, self.SETTINGS.data_attr)
-                self.STATE.bins = getattr(message, self.SETTINGS.bins_attr)
-                self.STATE._update = True
+                back["data"] = getattr(message, self.SETTINGS.data_attr)
+                back["bins"] = getattr(message, self.SETTINGS.bins_attr)
+                self.STATE.metrics.receive(1)
+                self.STATE.swap.publish()
+                self.mark_dirty()
 
     def update(self):
-        if self.STATE._update:
+        buffer = self.STATE.swap.acquire()
+        if buffer is not None:
+            self.STATE.data = buffer["data"]
+            self.STATE.bins = buffer["bins"]
+            self.STATE.swap.release(buffer)
             self.STATE.widget.update(self.STATE.data, self.STATE.bins)
-            self.STATE._update = False
 
 
 def compute_bins_from_axis(axis_arr):
@@ -6,17 +6,21 @@ import numpy as np
 
 import ezmsg.core as ez
 
+from ..helpers.swap_buffer import SwapBuffer
 from ..widgets.image_widget import ImageWidget
 from .plot_vis import PlotVis
 from .plot_vis import PlotVisSettings
 from .plot_vis import PlotVisState
 
 
+def merge_columns(into: dict, newer: dict):
+    into.setdefault("columns", []).extend(newer.pop("columns", []))
+
+
 class ImageVisState(PlotVisState):
     data: np.ndarray = None
     clim: Optional[Union[tuple[float, float], str]] = "auto"
     cmap: Optional[str] = "grays"
-    _update: bool = False
 
 
 class ImageVisSettings(PlotVisSettings):
@@ -24,6 +28,13 @@ class ImageVisSettings(PlotVisSettings):
     clim: Union[tuple[float, float], str] = "auto"
     cmap: str = "grays"
     aspect: float = None
+    # Keep this many columns (or rows) and scroll through them; messages
+    # then carry only the newest ones. None shows each message whole.
+    waterfall: Optional[int] = None
+    # 1 if messages carry columns, 0 if they carry rows.
+    waterfall_axis: int = 1
+    # Percentiles of recent values used as limits with clim="auto".
+    clim_percentiles: tuple[float, float] = (1.0, 99.0)
 
 
 class ImageVis(PlotVis):
@@ -39,17 +50,43 @@ class ImageVis(PlotVis):
     def initialize(self):
         self.STATE.clim = self.SETTINGS.clim
         self.STATE.cmap = self.SETTINGS.cmap
+        if self.SETTINGS.waterfall is not None:
+            # Every column counts, keep all those received between frames.
+            self.STATE.swap = SwapBuffer(merge=merge_columns)
 
     @ez.subscriber(INPUT)
     async def got_message(self, message: Any) -> None:
-        if self.STATE.widget is not None:
+        if self.forward(message):
+            return
+        if (
+            self.STATE.widget is not None
+            and self.SETTINGS.waterfall is not None
+            and not self.STATE.visible
+        ):
+            # Columns are not accumulated while the plot is hidden.
+            self.STATE.metrics.drop()
+        elif self.STATE.widget is not None:
             if hasattr(message, self.SETTINGS.data_attr):
-                self.STATE.data = getattr(message, self.SETTINGS.data_attr)
-                self.STATE._update = True
+                data = getattr(message, self.SETTINGS.data_attr)
+                if self.SETTINGS.waterfall is not None:
+                    self.STATE.swap.back.setdefault("columns", []).append(data)
+                else:
+                    self.STATE.swap.back["data"] = data
+                self.STATE.metrics.receive(1)
+                self.STATE.swap.publish()
+                self.mark_dirty()
 
     def update(self):
-        if self.STATE._update:
+        buffer = self.STATE.swap.acquire()
+        if buffer is not None and "columns" in buffer:
+            columns = buffer["columns"]
+            self.STATE.swap.release(buffer)
+            for block in columns:
+                self.STATE.widget.update(data=block)
+            self.STATE.widget.update(clim=self.STATE.clim, cmap=self.STATE.cmap)
+        elif buffer is not None:
+            self.STATE.data = buffer["data"]
+            self.STATE.swap.release(buffer)
             self.STATE.widget.update(
                 data=self.STATE.data, clim=self.STATE.clim, cmap=self.STATE.cmap
             )
-            self.STATE._update = False
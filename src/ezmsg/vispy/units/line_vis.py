@@ -17,13 +17,10 @@ from .plot_vis import PlotVisState
 class LineVisState(PlotVisState):
     """
     State for a Line
-    data: The raw data to display
-    _update: Bool to indicate if plot visual needs updating.
+    data: The data currently displayed
     """
 
     data: Optional[np.ndarray] = None
-    set_range: bool = False
-    _update: bool = False
 
 
 class LineVisSettings(PlotVisSettings):
@@ -56,6 +53,8 @@ class LineVis(PlotVis):
 
     @ez.subscriber(INPUT)
     async def got_message(self, message: Any) -> None:
+        if self.forward(message):
+            return
         if self.STATE.widget is not None:
             if issubclass(type(message), AxisArray):
                 axis = message.get_axis("time")
@@ -65,29 +64,34 @@ class LineVis(PlotVis):
                 data = np.empty(shape=(t.shape[0], 2))
                 data[:, 0] = t
                 data[:, 1] = message.data
-                if self.STATE.data is None:
-                    self.STATE.set_range = True
-                self.STATE.data = data
-                self.STATE._update = True
+                self.STATE.swap.back["data"] = data
+                self.STATE.metrics.receive(len(data))
+                self.STATE.swap.publish()
+                self.mark_dirty()
             elif self.SETTINGS.data_attr is not None and hasattr(
                 message, self.SETTINGS.data_attr
             ):
                 # This contains plot data.
-                if self.STATE.data is None:
-                    self.STATE.set_range = True
-                self.STATE.data = getattr(message, self.SETTINGS.data_attr)
-                self.STATE._update = True
+                data = getattr(message, self.SETTINGS.data_attr)
+                self.STATE.swap.back["data"] = data
+                self.STATE.metrics.receive(len(data))
+                self.STATE.swap.publish()
+                self.mark_dirty()
 
     def update(self):
-        if self.STATE._update and self.STATE.data is not None:
-            self.STATE.widget.visual.set_data(
-                self.STATE.data,
+        buffer = self.STATE.swap.acquire()
+        if buffer is None:
+            return
+        data = buffer["data"]
+        self.STATE.swap.release(buffer)
+
+        self.STATE.widget.visual.set_data(
+            data,
+        )
+        self.STATE.widget.total_upload_bytes += data.nbytes
+        if self.STATE.data is None:
+            self.STATE.widget.view.camera.set_range(
+                (min(data[:, 0]), max(data[:, 0])),
+                (min(data[:, 1]), max(data[:, 1])),
             )
-            if self.STATE.set_range:
-                self.STATE.widget.view.camera.set_range(
-                    (min(self.STATE.data[:, 0]), max(self.STATE.data[:, 0])),
-                    (min(self.STATE.data[:, 1]), max(self.STATE.data[:, 1])),
-                )
-                self.STATE.set_range = False
-
-            self.STATE._update = False
+        self.STATE.data = data
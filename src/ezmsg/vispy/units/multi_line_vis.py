@@ -1,6 +1,4 @@
-import asyncio
 import logging
-import threading
 from typing import Any
 from typing import Union
 
@@ -8,6 +6,7 @@ import numpy as np
 
 import ezmsg.core as ez
 
+from ..helpers.swap_buffer import SwapBuffer
 from ..widgets.multi_line_widget import MultiLineWidget
 from .plot_vis import PlotVis
 from .plot_vis import PlotVisSettings
@@ -16,18 +15,24 @@ from .plot_vis import PlotVisState
 logger = logging.getLogger(__name__)
 
 
+def merge_segments(into: dict, newer: dict):
+    """Merge two swap buffers, joining their data along the time axis."""
+    data = newer.pop("data", None)
+    into.update(newer)
+    if data is not None:
+        if into.get("data", None) is None:
+            into["data"] = data
+        else:
+            into["data"] = np.concatenate((into["data"], data), axis=1)
+
+
 class MultiLineVisState(PlotVisState):
     """
     State for a Line
-    data: The raw data to display
-    _update: Bool to indicate if plot visual needs updating.
+    fs: The sampling rate of the data
     """
 
-    data: np.ndarray = None
     fs: float = None
-    loop: asyncio.BaseEventLoop = None
-    lock: threading.Lock = None
-    _update: bool = False
     _configured: bool = False
     ch_mins: list[float] = None
     ch_maxs: list[float] = None
@@ -66,50 +71,47 @@ class MultiLineVis(PlotVis):
     ]
 
     def initialize(self):
-        self.STATE.loop = asyncio.get_event_loop()
-        self.STATE.lock = threading.Lock()
+        self.STATE.swap = SwapBuffer(merge=merge_segments)
 
     @ez.subscriber(INPUT)
     async def got_message(self, message: Any) -> None:
-        if self.STATE.widget is not None:
+        if self.forward(message):
+            return
+        if self.STATE.widget is not None and not self.STATE.visible:
+            # Samples are not accumulated while the plot is hidden.
+            self.STATE.metrics.drop()
+        elif self.STATE.widget is not None:
             if hasattr(message, self.SETTINGS.data_attr):
+                back = self.STATE.swap.back
                 if self.STATE.fs is None and hasattr(message, self.SETTINGS.fs_attr):
                     self.STATE.fs = getattr(message, self.SETTINGS.fs_attr)
+                back["fs"] = self.STATE.fs
                 if (
                     self.SETTINGS.ch_min_attr is not None
                     and hasattr(message, self.SETTINGS.ch_min_attr) is True
                 ):
-                    self.STATE.ch_mins = getattr(message, self.SETTINGS.ch_min_attr)
+                    back["ch_mins"] = getattr(message, self.SETTINGS.ch_min_attr)
                 if (
                     self.SETTINGS.ch_max_attr is not None
                     and hasattr(message, self.SETTINGS.ch_max_attr) is True
                 ):
-                    self.STATE.ch_maxs = getattr(message, self.SETTINGS.ch_max_attr)
+                    back["ch_maxs"] = getattr(message, self.SETTINGS.ch_max_attr)
                 # This contains plot data.
-                new_data = getattr(message, self.SETTINGS.data_attr)
-                # await self.STATE.loop.run_in_executor(None, self.STATE.lock.acquire)
-                self.STATE.lock.acquire()
-                if self.STATE.data is None:
-                    self.STATE.data = new_data
-                else:
-                    self.STATE.data = np.concatenate(
-                        (self.STATE.data, new_data), axis=1
-                    )
-                # await self.STATE.loop.run_in_executor(None, self.STATE.lock.release)
-                self.STATE.lock.release()
-                self.STATE._update = True
+                back["data"] = getattr(message, self.SETTINGS.data_attr)
+                self.STATE.metrics.receive(back["data"].shape[1])
+                self.STATE.swap.publish()
+                self.mark_dirty()
             else:
                 logger.warn("Received message did not have data attr!")
 
     def update(self):
-        if self.STATE._update is True:
-            with self.STATE.lock:
-                fs = self.STATE.fs
-                try:
-                    data = self.STATE.data.copy()
-                except AttributeError:
-                    return
-                self.STATE.data = None
+        buffer = self.STATE.swap.acquire()
+        if buffer is not None:
+            fs = buffer["fs"]
+            data = buffer["data"]
+            self.STATE.ch_mins = buffer.get("ch_mins", self.STATE.ch_mins)
+            self.STATE.ch_maxs = buffer.get("ch_maxs", self.STATE.ch_maxs)
+            self.STATE.swap.release(buffer)
             if self.STATE._configured is False:
                 self.STATE.widget.configure_segments(
                     window_length=self.SETTINGS.window_length,
@@ -126,5 +128,3 @@ class MultiLineVis(PlotVis):
                 self.STATE.widget.roll_data(
                     data,
                 )
-
-            self.STATE._update = False
@@ -1,9 +1,8 @@
-import asyncio
 import logging
-import threading
 from collections.abc import Sequence
 from dataclasses import dataclass
 from dataclasses import field
+from dataclasses import replace
 from typing import Optional
 from typing import Union
 
@@ -12,6 +11,9 @@ import numpy as np
 import ezmsg.core as ez
 from ezmsg.util.messages.axisarray import AxisArray
 
+from ..helpers.staging import staging_capacity
+from ..helpers.staging import StagingBuffer
+from ..helpers.swap_buffer import SwapBuffer
 from ..widgets.multitrace_widget import MultiTraceData
 from ..widgets.multitrace_widget import MultiTraceMode
 from ..widgets.multitrace_widget import MultiTraceWidget
@@ -32,17 +34,48 @@ class MultiTraceMessage:
     units: Optional[str] = None
 
 
+@dataclass
+class TraceBatch:
+    """Data of one trace received between two updates."""
+
+    trace: MultiTraceData
+    # Samples to append (ROLL mode).
+    staging: Optional[StagingBuffer] = None
+    # Latest block of samples (SET mode).
+    data: Optional[np.ndarray] = None
+
+
+def merge_batches(into: dict[str, TraceBatch], newer: dict[str, TraceBatch]):
+    for trace_name in list(newer.keys()):
+        batch = newer[trace_name]
+        pending = into.get(trace_name, None)
+        if pending is None or pending.trace is not batch.trace:
+            into[trace_name] = newer.pop(trace_name)
+        elif batch.staging is not None:
+            pending.staging.append(batch.staging.view())
+        else:
+            pending.data = batch.data
+
+
+def reset_batches(batches: dict[str, TraceBatch]):
+    # Keep the batches, and the memory of their staging buffers.
+    for batch in batches.values():
+        if batch.staging is not None:
+            batch.staging.clear()
+        batch.data = None
+
+
 class MultiTraceVisState(PlotVisState):
-    loop: asyncio.AbstractEventLoop
-    lock: threading.Lock
-    trace_map: dict[str, tuple[bool, MultiTraceData]] = field(default_factory=dict)
-    _update: bool = False
+    # Latest configuration of every trace, used by the subscriber only.
+    trace_map: dict[str, MultiTraceData] = field(default_factory=dict)
 
 
 class MultiTraceVisSettings(PlotVisSettings):
     mode: MultiTraceMode = MultiTraceMode.SET
     trace_colors: dict[str, set] = field(default_factory=dict)
     gridlines_en: bool = True
+    # Draw the min/max of every pixel column when zoomed out.
+    lod: bool = False
     axis: str = "time"
 
 
@@ -56,12 +89,16 @@ class MultiTraceVis(PlotVis):
     remove_attrs: list = PlotVis.remove_attrs + ["axis"]
 
     def initialize(self):
-        self.STATE.loop = asyncio.get_event_loop()
-        self.STATE.lock = threading.Lock()
+        self.STATE.swap = SwapBuffer(merge=merge_batches, reset=reset_batches)
 
     @ez.subscriber(INPUT)
     async def got_message(self, message: Union[MultiTraceMessage, AxisArray]) -> None:
-        if self.STATE.widget is not None:
+        if self.forward(message):
+            return
+        if self.STATE.widget is not None and not self.STATE.visible:
+            # Samples are not accumulated while the plot is hidden.
+            self.STATE.metrics.drop()
+        elif self.STATE.widget is not None:
             if type(message) is MultiTraceMessage:
                 trace_name = message.trace_name
                 data = message.data
@@ -81,10 +118,10 @@ class MultiTraceVis(PlotVis):
                 ch_names = None
                 units = message.get_axis(1).unit
 
-            self.STATE.lock.acquire()
-            _, trace = self.STATE.trace_map.get(trace_name, [None, None])
+            trace = self.STATE.trace_map.get(trace_name, None)
             if (
                 trace is None
+                or trace.data.shape[1:] != data.shape[1:]
                 or trace.ch_names != ch_names
                 or trace.fs != fs
                 or (
@@ -94,32 +131,35 @@ class MultiTraceVis(PlotVis):
                 )
             ):
                 trace = MultiTraceData(data, fs, x_arr, trace_name, ch_names, units)
-            else:
-                if (
-                    trace.data is None
-                    or self.SETTINGS.mode is MultiTraceMode.SET
-                    or (
-                        trace.data is not None
-                        and trace.data.shape[1:] != message.data.shape[1:]
+                self.STATE.trace_map[trace_name] = trace
+
+            back = self.STATE.swap.back
+            batch = back.get(trace_name, None)
+            if batch is None or batch.trace is not trace:
+                batch = TraceBatch(trace)
+                if self.SETTINGS.mode is MultiTraceMode.ROLL:
+                    batch.staging = StagingBuffer(
+                        staging_capacity(fs or 0.0), data.shape[1:], data.dtype
                     )
-                ):
-                    trace.data = message.data
-                else:
-                    trace.data = np.concatenate((trace.data, data), axis=0)
-            self.STATE.trace_map[trace_name] = (True, trace)
-            self.STATE.lock.release()
-            self.STATE._update = True
+                back[trace_name] = batch
+            if batch.staging is not None:
+                batch.staging.append(data)
+            else:
+                batch.data = data
+            self.STATE.metrics.receive(data.shape[0])
+            self.STATE.swap.publish()
+            self.mark_dirty()
 
     def update(self):
-        if self.STATE._update is True:
-            with self.STATE.lock:
-                for key in self.STATE.trace_map.keys():
-                    update, trace = self.STATE.trace_map[key]
-                    if update is True:
-                        if self.SETTINGS.mode == MultiTraceMode.ROLL:
-                            self.STATE.widget.roll_data(trace)
-                        if self.SETTINGS.mode == MultiTraceMode.SET:
-                            self.STATE.widget.set_data(trace)
-                        trace.data = None
-                        self.STATE.trace_map[key] = (False, trace)
-                self.STATE._update = False
+        buffer = self.STATE.swap.acquire()
+        if buffer is None:
+            return
+        for batch in buffer.values():
+            if batch.staging is not None and len(batch.staging) > 0:
+                trace = replace(batch.trace, data=batch.staging.view())
+                self.STATE.widget.roll_data(trace)
+                self.STATE.metrics.stage(len(batch.staging))
+            elif batch.data is not None:
+                trace = replace(batch.trace, data=batch.data)
+                self.STATE.widget.set_data(trace)
+        self.STATE.swap.release(buffer)
@@ -1,16 +1,70 @@
 import asyncio
+import socket
+import time
 from dataclasses import asdict
+from dataclasses import dataclass
 from dataclasses import field
 from typing import Any
 from typing import Optional
 
-from qtpy import QtCore
 from qtpy import QtWidgets
 
 import ezmsg.core as ez
 from ezmsg.util.messagegate import GateMessage
 
-from ..helpers.constants import TIMER_INTERVAL
+from ..frontends.relay import decode_frame
+from ..frontends.relay import FrameDecoder
+from ..helpers.frame_scheduler import FrameScheduler
+from ..helpers.metrics import merge_remote_reports
+from ..helpers.metrics import PlotMetrics
+from ..helpers.shared_ring import SharedFrameRing
+from ..helpers.swap_buffer import SwapBuffer
+
+
+@dataclass
+class PlotMetricsMessage:
+    """Performance of a plot over the last ``period`` seconds.
+
+    Times are in seconds. Latencies go from the arrival of a message to
+    the first draw that shows it, and are NaN when nothing was drawn.
+    """
+
+    period: float
+    messages: int
+    samples: int
+    # Messages merged into a frame before it was updated.
+    coalesced: int
+    # Messages discarded, e.g. while the plot was hidden.
+    dropped: int
+    updates: int
+    update_time: float
+    max_update_time: float
+    upload_bytes: int
+    fps: float
+    latency_p50: float
+    latency_p90: float
+    latency_p99: float
+    # Most samples staged for one update, for plots that stage samples.
+    staging_high_water: int = 0
+
+
+@dataclass
+class DisplayDemandMessage(GateMessage):
+    """What a plot shows, so upstream units can skip computing the rest.
+
+    ``open`` is True while the plot is on screen, as in `GateMessage`, so
+    gates driven by the visibility of a plot keep working. The other
+    fields are None when the plot does not restrict them.
+    """
+
+    # Interval of the x axis in view, in data units.
+    span: Optional[tuple[float, float]] = None
+    # Data units of the x axis per pixel.
+    resolution: Optional[float] = None
+    # Indices of the channels on screen, per trace.
+    channels: Optional[dict[str, tuple[int, ...]]] = None
+    # Samples per pixel at the sampling rate of each trace.
+    samples_per_pixel: Optional[dict[str, float]] = None
 
 
 class PlotVisSettings(ez.Settings):
@@ -28,54 +82,193 @@ class PlotVisSettings(ez.Settings):
     gridlines_en: bool = False
     fg_color: str = "w"
     bg_color: str = "k"
+    # Kept for compatibility; visuals are updated by the FrameScheduler.
     external_timer: bool = False
+    # Seconds between two metrics messages, 0 disables them.
+    metrics_interval: float = 1.0
 
 
 class PlotVisState(ez.State):
     widget: Optional[QtWidgets.QWidget] = None
-    timer: Optional[QtCore.QTimer] = None
+    scheduler: Optional[FrameScheduler] = None
     evs: asyncio.Queue = field(default_factory=asyncio.Queue)
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    # Hidden plots skip their updates until they are shown again.
+    visible: bool = True
+    # Last display demand of the widget, see DisplayDemandMessage.
+    demand: dict = field(default_factory=dict)
+    # Hands messages from the subscribers to update() without locking.
+    swap: SwapBuffer = field(default_factory=SwapBuffer)
+    metrics: PlotMetrics = field(default_factory=PlotMetrics)
+    # Set when the widget lives in a GUI process: messages are forwarded
+    # through the ring, and the link carries wake-ups, display demands and
+    # metrics.
+    ring: Optional[SharedFrameRing] = None
+    link: Optional[socket.socket] = None
+    link_watched: bool = False
+    link_decoder: FrameDecoder = field(default_factory=FrameDecoder)
+    # Metrics reports sent back by the plot in the GUI process.
+    remote_metrics: list = field(default_factory=list)
 
 
 class PlotVis(ez.Unit):
     SETTINGS = PlotVisSettings
     STATE = PlotVisState
 
-    EVS_OUTPUT = ez.OutputStream(Any)
+    EVS_OUTPUT = ez.OutputStream(DisplayDemandMessage)
+    METRICS_OUTPUT = ez.OutputStream(PlotMetricsMessage)
 
     widget_type: type
-    remove_attrs: list[str] = ["external_timer"]
+    remove_attrs: list[str] = ["external_timer", "metrics_interval"]
 
     def build(self) -> QtWidgets.QWidget:
         kwargs = asdict(self.SETTINGS)
         [kwargs.pop(key) for key in self.remove_attrs]
         self.STATE.widget = self.widget_type(**kwargs)
 
-        if not self.SETTINGS.external_timer:
-            self.STATE.timer = QtCore.QTimer()
-            self.STATE.timer.setInterval(TIMER_INTERVAL)
-            self.STATE.timer.start()
-            self.STATE.timer.timeout.connect(self.update)
+        # update() runs on the Qt thread whenever new data was received.
+        self.STATE.scheduler = FrameScheduler.instance()
+        # Latencies are only measured for published metrics.
+        self.STATE.metrics.timestamps = self.SETTINGS.metrics_interval > 0
 
         self.STATE.widget.visibility_change_ev.connect(self.set_visibility)
+        self.STATE.widget.display_demand_ev.connect(self.set_display_demand)
+        canvas = getattr(self.STATE.widget, "canvas", None)
+        if canvas is not None:
+            canvas.events.draw.connect(self.on_draw, position="last")
 
         return self.STATE.widget
 
     def stop(self) -> None:
-        if not self.SETTINGS.external_timer and self.STATE.timer is not None:
-            self.STATE.timer.stop()
+        self.STATE.scheduler = None
+        self.STATE.ring = None
+
+    @property
+    def visible(self) -> bool:
+        return self.STATE.visible
+
+    def mark_dirty(self) -> None:
+        """Schedule update() for the next frame. Safe to call from any thread."""
+        if self.STATE.scheduler is not None and self.STATE.visible:
+            self.STATE.scheduler.mark_dirty(self.frame)
+
+    def frame(self) -> None:
+        """Run update() for a frame of the FrameScheduler."""
+        if not self.STATE.visible:
+            # Hidden since it was marked.
+            return
+        received = self.STATE.metrics.take_received()
+        start = time.perf_counter()
+        self.update()
+        self.STATE.metrics.update(time.perf_counter() - start, received)
+
+    def on_draw(self, event) -> None:
+        self.STATE.metrics.draw()
 
     def set_visibility(self, visible: bool):
-        # loop = asyncio.get_event_loop()
-        # loop.call_soon_threadsafe(self.STATE.evs.put_nowait, visible)
-        # asyncio.run_coroutine_threadsafe(self.STATE.evs.put(visible), loop)
-        self.STATE.evs.put_nowait(visible)
+        self.STATE.visible = visible
+        if visible:
+            # Catch up with the data received while hidden.
+            self.mark_dirty()
+        self._send_demand()
+
+    def set_display_demand(self, demand: dict):
+        self.STATE.demand = demand
+        self._send_demand()
+
+    def display_demand(self) -> DisplayDemandMessage:
+        return DisplayDemandMessage(self.STATE.visible, **self.STATE.demand)
+
+    def _send_demand(self):
+        # Runs on the Qt thread, the queue belongs to the ezmsg event loop.
+        # Until on_event sets the loop, it sends the current demand itself.
+        if self.STATE.loop is not None:
+            self.STATE.loop.call_soon_threadsafe(
+                self.STATE.evs.put_nowait, self.display_demand()
+            )
 
     def update(self) -> None:
         raise NotImplementedError
 
+    def attach_remote(self, ring: SharedFrameRing, link: socket.socket) -> None:
+        """Forward messages to a widget in another process.
+
+        The subscribers then only copy messages into ``ring``; a copy of
+        this unit in the GUI process handles them (see `gui_process`).
+        """
+        link.setblocking(False)
+        self.STATE.ring = ring
+        self.STATE.link = link
+        if self.STATE.loop is not None:
+            self.STATE.loop.call_soon_threadsafe(self._watch_link)
+
+    def forward(self, message: Any) -> bool:
+        """Pass a message to the GUI process, if the widget lives there.
+
+        Subscribers call this first, and return if it returns True.
+        """
+        if self.STATE.ring is None:
+            return False
+        # The copy of this unit in the GUI process decides what to do with
+        # messages while the plot is hidden.
+        if not self.STATE.ring.write(message):
+            self.STATE.metrics.drop()
+            return True
+        self.STATE.metrics.forward()
+        try:
+            self.STATE.link.send(b"\x00")
+        except (BlockingIOError, OSError):
+            # A wake-up is already pending, or the GUI process is gone.
+            pass
+        return True
+
+    def _watch_link(self) -> None:
+        if self.STATE.link is None or self.STATE.link_watched:
+            return
+        self.STATE.link_watched = True
+        self.STATE.loop.add_reader(self.STATE.link.fileno(), self._on_link)
+
+    def _on_link(self) -> None:
+        decoder = self.STATE.link_decoder
+        try:
+            frames = decoder.read_from(self.STATE.link)
+        except OSError:
+            frames = []
+            decoder.closed = True
+        for raw in frames:
+            msg = decode_frame(raw)
+            if isinstance(msg, PlotMetricsMessage):
+                self.STATE.remote_metrics.append(asdict(msg))
+                continue
+            self.STATE.visible = msg.open
+            self.STATE.evs.put_nowait(msg)
+        if decoder.closed:
+            # The GUI process closed the link.
+            self.STATE.loop.remove_reader(self.STATE.link.fileno())
+
     @ez.publisher(EVS_OUTPUT)
     async def on_event(self):
+        self.STATE.loop = asyncio.get_running_loop()
+        self._watch_link()
+        # Demands changed before the loop was known (first show, initial
+        # resize) were not queued; start upstream units from the current one.
+        yield self.EVS_OUTPUT, self.display_demand()
+        while True:
+            demand = await self.STATE.evs.get()
+            yield self.EVS_OUTPUT, demand
+
+    @ez.publisher(METRICS_OUTPUT)
+    async def publish_metrics(self):
+        if self.SETTINGS.metrics_interval <= 0:
+            return
         while True:
-            visibility = await self.STATE.evs.get()
-            yield self.EVS_OUTPUT, GateMessage(visibility)
+            await asyncio.sleep(self.SETTINGS.metrics_interval)
+            upload_bytes = getattr(self.STATE.widget, "total_upload_bytes", 0)
+            values = self.STATE.metrics.report(
+                self.STATE.swap.producer_contention, upload_bytes
+            )
+            if self.STATE.ring is not None:
+                # The plot itself runs in the GUI process.
+                remote, self.STATE.remote_metrics = self.STATE.remote_metrics, []
+                values = merge_remote_reports(values, remote)
+            yield self.METRICS_OUTPUT, PlotMetricsMessage(**values)
@@ -0,0 +1,112 @@
+from typing import Any
+from typing import Optional
+from typing import Union
+
+import numpy as np
+
+import ezmsg.core as ez
+from ezmsg.util.messages.axisarray import AxisArray
+
+from ..helpers.swap_buffer import SwapBuffer
+from ..widgets.spectrogram_widget import SpectrogramWidget
+from .plot_vis import PlotVis
+from .plot_vis import PlotVisSettings
+from .plot_vis import PlotVisState
+
+
+def merge_samples(into: dict, newer: dict):
+    into.setdefault("samples", []).extend(newer.pop("samples", []))
+    if "fs" in newer:
+        into["fs"] = newer.pop("fs")
+
+
+class SpectrogramVisState(PlotVisState):
+    fs: Optional[float] = None
+    clim: Optional[Union[tuple[float, float], str]] = "auto"
+    cmap: Optional[str] = "cubehelix"
+
+
+class SpectrogramVisSettings(PlotVisSettings):
+    # Attribute holding the samples of messages that are not AxisArrays.
+    data_attr: Optional[str] = None
+    # Axis of the samples in AxisArrays; other axes are channels.
+    axis: str = "time"
+    # Channels shown, stacked; None shows all of them.
+    channels: Optional[list[int]] = None
+    n_fft: int = 256
+    step: Optional[int] = None
+    # Sample rate, taken from the time axis of AxisArrays if None.
+    fs: Optional[float] = None
+    window: Optional[str] = "hann"
+    normalize: bool = False
+    color_scale: str = "log"
+    # Number of frames shown.
+    history: int = 512
+    cmap: str = "cubehelix"
+    clim: Union[tuple[float, float], str] = "auto"
+
+
+class SpectrogramVis(PlotVis):
+    """
+    Subscribe to a stream of samples and show its scrolling spectrogram.
+    """
+
+    INPUT = ez.InputStream(Any)
+
+    STATE = SpectrogramVisState
+    SETTINGS = SpectrogramVisSettings
+
+    widget_type: type = SpectrogramWidget
+
+    remove_attrs: list = PlotVis.remove_attrs + ["data_attr", "axis", "channels"]
+
+    def initialize(self):
+        self.STATE.clim = self.SETTINGS.clim
+        self.STATE.cmap = self.SETTINGS.cmap
+        # Every sample counts, keep all those received between frames.
+        self.STATE.swap = SwapBuffer(merge=merge_samples)
+
+    @ez.subscriber(INPUT)
+    async def got_message(self, message: Any) -> None:
+        if self.forward(message):
+            return
+        if self.STATE.widget is not None and not self.STATE.visible:
+            # Samples are not accumulated while the plot is hidden.
+            self.STATE.metrics.drop()
+        elif self.STATE.widget is not None:
+            if isinstance(message, AxisArray):
+                axis = message.get_axis(self.SETTINGS.axis)
+                data = np.moveaxis(
+                    message.data, message.get_axis_idx(self.SETTINGS.axis), 0
+                )
+                data = data.reshape(data.shape[0], -1)
+                if self.STATE.fs != 1.0 / axis.gain:
+                    self.STATE.fs = 1.0 / axis.gain
+                    self.STATE.swap.back["fs"] = self.STATE.fs
+            elif self.SETTINGS.data_attr is not None and hasattr(
+                message, self.SETTINGS.data_attr
+            ):
+                data = np.asarray(getattr(message, self.SETTINGS.data_attr))
+                if data.ndim == 1:
+                    data = data[:, np.newaxis]
+            else:
+                return
+            if self.SETTINGS.channels is not None:
+                data = data[:, self.SETTINGS.channels]
+            self.STATE.swap.back.setdefault("samples", []).append(data)
+            self.STATE.metrics.receive(data.shape[0])
+            self.STATE.swap.publish()
+            self.mark_dirty()
+
+    def update(self):
+        buffer = self.STATE.swap.acquire()
+        if buffer is None:
+            return
+        samples = buffer.get("samples", [])
+        fs = buffer.get("fs", None)
+        self.STATE.swap.release(buffer)
+        if fs is not None and self.SETTINGS.fs is None:
+            self.STATE.widget.fs = fs
+        for block in samples:
+            self.STATE.widget.update(data=block)
+        self.STATE.widget.update(clim=self.STATE.clim, cmap=self.STATE.cmap)
@@ -87,7 +87,12 @@ class BasePlotWidget(QtWidgets.QWidget):
     xaxis: Union[QtWidgets.QWidget, scene.AxisWidget]
     yaxis: Union[QtWidgets.QWidget, scene.AxisWidget]
 
+    # Delay between a change of the view and its display demand, in ms.
+    DEMAND_INTERVAL: int = 100
+
     visibility_change_ev = QtCore.Signal(bool)
+    # Emits the result of display_demand() when it changes.
+    display_demand_ev = QtCore.Signal(dict)
 
     def __init__(
         self,
@@ -125,6 +130,8 @@ class BasePlotWidget(QtWidgets.QWidget):
         self.camera = None
         self.cbar = None
         self._configured = False
+        # Bytes of data handed to the GPU since creation.
+        self.total_upload_bytes = 0
 
         self.grid = QtWidgets.QGridLayout(self)
         self.grid.setSpacing(0)
@@ -139,16 +146,100 @@ class BasePlotWidget(QtWidgets.QWidget):
             QtWidgets.QSizePolicy.Policy.Expanding,
         )
 
-        # self.installEventFilter(self)
+        # Whether the plot is on screen: shown, not minimized and not empty.
+        self.on_screen = False
+        self._watched_window = None
+        self.installEventFilter(self)
+
+        # Views are reported once they settle, the latest one wins.
+        self._watched_camera = None
+        self._demand: Optional[dict] = None
+        self._demand_timer = QtCore.QTimer(self)
+        self._demand_timer.setSingleShot(True)
+        self._demand_timer.setInterval(self.DEMAND_INTERVAL)
+        self._demand_timer.timeout.connect(self._emit_display_demand)
 
     def eventFilter(self, o, e):
-        if o is self:
-            if e.type() == QtCore.QEvent.Type.Show:
-                print("Visible")
-            elif e.type() == QtCore.QEvent.Type.Hide:
-                print("Hidden")
+        if e.type() in (
+            QtCore.QEvent.Type.Show,
+            QtCore.QEvent.Type.Hide,
+            QtCore.QEvent.Type.Resize,
+            QtCore.QEvent.Type.WindowStateChange,
+        ):
+            if o is self and e.type() == QtCore.QEvent.Type.Show:
+                self._watch_window()
+                self._watch_camera()
+            self._check_on_screen()
+            if o is self and self.on_screen:
+                self.request_display_demand()
         return False
 
+    def _watch_window(self):
+        # Minimizing only changes the state of the top level window.
+        window = self.window()
+        if window is not self._watched_window:
+            if self._watched_window is not None:
+                self._watched_window.removeEventFilter(self)
+            if window is not self:
+                window.installEventFilter(self)
+            self._watched_window = window
+
+    def _watch_camera(self):
+        # Subclasses replace the camera of the view after _configure_2d.
+        camera = getattr(getattr(self, "view", None), "camera", None)
+        if camera is self._watched_camera:
+            return
+        if self._watched_camera is not None:
+            self._watched_camera.transform.changed.disconnect(self._on_camera_change)
+        if camera is not None:
+            camera.transform.changed.connect(self._on_camera_change)
+        self._watched_camera = camera
+
+    def _on_camera_change(self, event):
+        self.request_display_demand()
+
+    def request_display_demand(self):
+        """Emit display_demand_ev once the view settled, if it changed."""
+        if not self._demand_timer.isActive():
+            self._demand_timer.start()
+
+    def _emit_display_demand(self):
+        demand = self.display_demand()
+        if demand != self._demand:
+            self._demand = demand
+            self.display_demand_ev.emit(demand)
+
+    def display_demand(self) -> dict:
+        """Part of the data shown by the plot.
+
+        Returns
+        -------
+        dict
+            Fields of a `DisplayDemandMessage` besides ``open``: the span
+            of the x axis in view and its data units per pixel. Empty for
+            plots without a pan/zoom camera, which show all their data.
+        """
+        camera = getattr(getattr(self, "view", None), "camera", None)
+        if not isinstance(camera, scene.PanZoomCamera):
+            return {}
+        rect = camera.rect
+        pixels = self.view.size[0]
+        return {
+            "span": (float(rect.left), float(rect.right)),
+            "resolution": float(rect.width) / pixels if pixels > 0 else None,
+        }
+
+    def _check_on_screen(self):
+        on_screen = (
+            self.isVisible()
+            and self.width() > 0
+            and self.height() > 0
+            and not self.window().isMinimized()
+        )
+        if on_screen != self.on_screen:
+            self.on_screen = on_screen
+            self.visibility_change_ev.emit(on_screen)
+
     def _configure_2d(self):
         if self._configured:
             return
@@ -451,7 +542,3 @@ class BasePlotWidget(QtWidgets.QWidget):
 
     def update(self):
         raise NotImplementedError
-
-    def setVisible(self, visible: bool) -> None:
-        self.visibility_change_ev.emit(visible)
-        return super().setVisible(visible)
@@ -1,10 +1,12 @@
+from functools import partial
 from typing import Optional
 from typing import Union
 
 import numpy as np
 
-from vispy import scene
-
+from ..helpers.auto_clim import AutoClim
+from ..helpers.complex_image import ComplexImage
+from ..helpers.complex_image import reduce_complex
 from ..helpers.ranged_pan_zoom import RangedPanZoomCamera
 from .base_plot_widget import BasePlotWidget
 
@@ -20,8 +22,9 @@ class ComplexImageWidget(BasePlotWidget):
         clim="auto",
         gamma=1.0,
         interpolation="nearest",
-        texture_format="auto",
         aspect=None,
+        log_scale: bool = False,
+        clim_percentiles: tuple[float, float] = (1.0, 99.0),
         *args,
         **kwargs
     ):
@@ -30,22 +33,27 @@ class ComplexImageWidget(BasePlotWidget):
         self._configure_2d()
         camera = RangedPanZoomCamera(aspect=1)
         self.view.camera = camera
-        self.visual = scene.visuals.ComplexImage(
+        # Frames are uploaded as complex64, the complex_mode reduction and
+        # the log scale are done by the shader.
+        self.visual = ComplexImage(
             data,
             complex_mode,
+            log_scale,
             method=method,
             grid=grid,
             cmap=cmap,
-            clim=clim,
+            clim=clim if isinstance(clim, tuple) else (0.0, 1.0),
             gamma=gamma,
             interpolation=interpolation,
-            texture_format=texture_format,
             parent=self.view.scene,
         )
         self.link_views()
         if aspect is not None:
             camera.aspect = aspect
-        self._clim_auto = True
+        # Limits used with clim="auto", from a subsample of each frame.
+        self.auto_clim = AutoClim(clim_percentiles)
+        self._clim_auto = isinstance(clim, str) and clim == "auto"
+        self._data = data
 
     def update(
         self,
@@ -53,27 +61,44 @@ class ComplexImageWidget(BasePlotWidget):
         clim: Optional[Union[tuple[float, float], str]] = None,
         cmap: Optional[str] = None,
         complex_mode: Optional[str] = None,
+        log_scale: Optional[bool] = None,
     ):
         if data is not None:
             self.check_update_viewbox(data)
             self.visual.set_data(data)
+            self.total_upload_bytes += data.nbytes
+            self._data = data
 
         if clim is not None:
             if isinstance(clim, tuple):
                 self.visual.clim = clim
                 self._clim_auto = False
-            elif isinstance(clim, str) and clim == "auto":
+            elif isinstance(clim, str) and clim == "auto" and not self._clim_auto:
                 self._clim_auto = True
+                self.auto_clim.reset()
 
         if cmap is not None:
             self.visual.cmap = cmap
 
-        if complex_mode is not None:
+        # Only uniforms change, but the values shown need new limits.
+        if complex_mode is not None and complex_mode != self.visual.complex_mode:
             self.visual.complex_mode = complex_mode
+            self.auto_clim.reset()
+        if log_scale is not None and log_scale != self.visual.log_scale:
+            self.visual.log_scale = log_scale
+            self.auto_clim.reset()
+
+        if self._clim_auto is True and self._data is not None:
+            if self.auto_clim.limits is None or data is not None:
+                transform = partial(
+                    reduce_complex,
+                    mode=self.visual.complex_mode,
+                    log_scale=self.visual.log_scale,
+                )
+                if self.auto_clim.update(self._data, transform):
+                    self.visual.clim = self.auto_clim.limits
 
         self.canvas.update()
-        if self._clim_auto is True:
-            self.visual.clim = "auto"
 
     def check_update_viewbox(self, new_data):
         new_shape = new_data.shape[::-1]
@@ -42,6 +42,7 @@ class HistogramWidget(BasePlotWidget):
         tris[::2] = tri_1 + offsets
         tris[1::2] = tri_2 + offsets
         self.visual.set_data(rr, tris)
+        self.total_upload_bytes += rr.nbytes + tris.nbytes
         x_range = (min(bin_edges), max(bin_edges))
         y_range = (min(data), max(data))
 
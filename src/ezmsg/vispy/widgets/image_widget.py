@@ -4,9 +4,11 @@ from typing import Union
 import numpy as np
 
 from vispy import color
-from vispy import scene
 
+from ..helpers.auto_clim import AutoClim
+from ..helpers.native_image import NativeImage
 from ..helpers.ranged_pan_zoom import RangedPanZoomCamera
+from ..helpers.waterfall import WaterfallImage
 from .base_plot_widget import BasePlotWidget
 
 
@@ -22,6 +24,9 @@ class ImageWidget(BasePlotWidget):
         interpolation="nearest",
         texture_format=None,
         aspect=None,
+        waterfall: Optional[int] = None,
+        waterfall_axis: int = 1,
+        clim_percentiles: tuple[float, float] = (1.0, 99.0),
         *args,
         **kwargs,
     ):
@@ -32,21 +37,40 @@ class ImageWidget(BasePlotWidget):
         self._configure_2d()
         camera = RangedPanZoomCamera(aspect=1)
         self.view.camera = camera
-        self.visual = scene.visuals.Image(
-            data,
-            method,
-            grid,
-            cmap,
-            clim,
-            gamma,
-            interpolation,
-            texture_format,
-            parent=self.view.scene,
-        )
+        # In waterfall mode, update() receives the newest columns (or rows)
+        # only, and the image keeps the last ``waterfall`` of them.
+        self.waterfall = waterfall
+        if waterfall is not None:
+            self.visual = WaterfallImage(
+                waterfall,
+                waterfall_axis,
+                method=method,
+                grid=grid,
+                cmap=cmap,
+                clim=clim,
+                gamma=gamma,
+                interpolation=interpolation,
+                parent=self.view.scene,
+            )
+        else:
+            # uint8, uint16 and int16 frames are uploaded without conversion.
+            self.visual = NativeImage(
+                data,
+                method=method,
+                grid=grid,
+                cmap=cmap,
+                clim=clim,
+                gamma=gamma,
+                interpolation=interpolation,
+                texture_format=texture_format,
+                parent=self.view.scene,
+            )
         self.link_views()
         if aspect is not None:
             camera.aspect = aspect
-        self._clim_auto = True
+        # Limits used with clim="auto".
+        self.auto_clim = AutoClim(clim_percentiles)
+        self._clim_auto = isinstance(clim, str) and clim == "auto"
 
     def update(
         self,
@@ -54,9 +78,19 @@ class ImageWidget(BasePlotWidget):
         clim: Optional[Union[tuple[float, float], str]] = None,
         cmap: Optional[Union[str, color.Colormap]] = None,
     ):
-        if data is not None:
+        if data is not None and self.waterfall is not None:
+            size = self.visual.size
+            self.visual.append(data)
+            if self.visual.size != size:
+                self._fit_view(self.visual.size)
+            self.total_upload_bytes += self.visual.take_upload_bytes()
+        elif data is not None:
             self.check_update_viewbox(data)
             self.visual.set_data(data)
+        if self.waterfall is None:
+            # Frames are uploaded when drawn, converted for their texture;
+            # this counts the draws since the previous update.
+            self.total_upload_bytes += self.visual.take_upload_bytes()
 
         if clim is not None:
             if isinstance(clim, tuple):
@@ -64,21 +98,31 @@ class ImageWidget(BasePlotWidget):
                 if self.cbar is not None:
                     self.cbar.clim = clim
                 self._clim_auto = False
-            elif isinstance(clim, str) and clim == "auto":
+            elif isinstance(clim, str) and clim == "auto" and not self._clim_auto:
                 self._clim_auto = True
+                self.auto_clim.reset()
 
         if cmap is not None:
             self.visual.cmap = cmap
             if self.cbar is not None:
                 self.cbar.cmap = cmap
 
+        if self._clim_auto is True and data is not None:
+            if self.auto_clim.update(data):
+                self.visual.clim = self.auto_clim.limits
+                if self.cbar is not None:
+                    self.cbar.clim = self.auto_clim.limits
+
         self.canvas.update()
-        if self._clim_auto is True:
-            if self.cbar is not None:
-                self.cbar.clim = self.visual.clim
-            self.visual.clim = "auto"
 
     def check_update_viewbox(self, new_data):
         new_shape = new_data.shape[::-1]
         if self.visual._data is None or self.visual.size != new_shape:
             self.view.camera.set_range((0, new_shape[0]), (0, new_shape[1]))
+
+    def _fit_view(self, size):
+        # The image may be scaled to data units by its transform.
+        corners = self.visual.transform.map(np.array([[0.0, 0.0], size]))
+        self.view.camera.set_range(
+            (corners[0, 0], corners[1, 0]), (corners[0, 1], corners[1, 1])
+        )
@@ -162,6 +162,7 @@ class MultiLineWidget(BasePlotWidget):
         data[:, num_data_pts:, 1] = data[:, :-num_data_pts, 1]
         data[:, :num_data_pts, 1] = new_data
         self.line.set_data(pos=data)
+        self.total_upload_bytes += data.nbytes
 
         if self._update_yax is True:
             self.update_y_axes()
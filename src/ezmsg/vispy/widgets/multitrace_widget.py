@@ -12,7 +12,12 @@ from qtpy import QtWidgets
 from vispy import color
 from vispy import scene
 
+from ..helpers.decimation import minmax_envelope
+from ..helpers.decimation import MinMaxRing
+from ..helpers.decimation import samples_per_pixel
 from ..helpers.ranged_pan_zoom import RangedPanZoomCamera
+from ..helpers.roll_transform import RollTransform
+from ..helpers.streaming_line import MultiChannelLine
 from .base_plot_widget import BasePlotWidget
 
 logger = logging.getLogger(__name__)
@@ -46,6 +51,65 @@ class Coupling(enum.Enum):
     DC = enum.auto()
 
 
+class ChannelTransform:
+    """Offset and scale of one channel of a `MultiChannelLine`.
+
+    Mimics the ``translate`` and ``scale`` of an `STTransform`, but stores
+    them in the per-channel parameters of the shared visual.
+    """
+
+    def __init__(self, visual: MultiChannelLine, index: int):
+        self.visual = visual
+        self.index = index
+
+    @property
+    def translate(self):
+        return (0.0, self.visual.channel_param(self.index, "offset"), 0.0, 0.0)
+
+    @translate.setter
+    def translate(self, val):
+        self.visual.set_channel(self.index, offset=val[1])
+
+    @property
+    def scale(self):
+        return (1.0, self.visual.channel_param(self.index, "scale"), 1.0, 1.0)
+
+    @scale.setter
+    def scale(self, val):
+        self.visual.set_channel(self.index, scale=val[1])
+
+
+class ChannelLine:
+    """One channel of a `MultiChannelLine`, drawn with all other channels."""
+
+    def __init__(self, visual: MultiChannelLine, index: int):
+        self.visual = visual
+        self.index = index
+        self.transform = ChannelTransform(visual, index)
+
+    @property
+    def y(self) -> Optional[np.ndarray]:
+        if self.visual.y is None:
+            return None
+        return self.visual.y[:, self.index]
+
+    @property
+    def visible(self) -> bool:
+        return self.visual.channel_param(self.index, "visible") > 0.5
+
+    @visible.setter
+    def visible(self, val: bool):
+        self.visual.set_channel(self.index, visible=val)
+
+    @property
+    def color(self) -> color.Color:
+        return self.visual.channel_color(self.index)
+
+    @color.setter
+    def color(self, val):
+        self.visual.set_channel(self.index, color=val)
+
+
 class EditPolygon(scene.Polygon):
     def __init__(
         self,
@@ -53,7 +117,7 @@ class EditPolygon(scene.Polygon):
         cy,
         dx,
         dy,
-        line: Optional[scene.Line] = None,
+        line: Optional[ChannelLine] = None,
         scale_cb: Optional[Callable] = None,
         *args,
         **kwargs,
@@ -86,7 +150,7 @@ class EditPolygon(scene.Polygon):
         if self.line is not None and self.line.transform is not None:
             self.current_scale = self.line.transform.scale[1]
 
-    def set_line(self, line: scene.Line):
+    def set_line(self, line: ChannelLine):
         self.line = line
         self.line.transform.translate = (0, self.cy, 0)
 
@@ -101,9 +165,10 @@ class EditPolygon(scene.Polygon):
             self.send_scale()
 
     def autoscale(self, num_divs=2.0):
-        if self.line is not None and self.line.pos is not None:
-            min_y, max_y = min(self.line.pos[:, 1]), max(self.line.pos[:, 1])
-            scale = abs(max_y - min_y) + abs(np.mean(self.line.pos[:, 1])) * 1.5
+        if self.line is not None and self.line.y is not None:
+            y = self.line.y
+            min_y, max_y = y.min(), y.max()
+            scale = abs(max_y - min_y) + abs(np.mean(y)) * 1.5
             if scale != 0.0:
                 self.line.transform.scale = (1, num_divs / scale)
             self.send_scale()
@@ -138,7 +203,7 @@ class MultiTraceData:
 
 @dataclass
 class TraceVisuals:
-    line: scene.Line
+    line: ChannelLine
     marker: EditPolygon
     coupling: Optional[Coupling] = None
 
@@ -161,11 +226,25 @@ class TraceVisuals:
 
 @dataclass
 class TraceInfo:
+    # Samples of all channels, time x channels.
     data: np.ndarray = field(default_factory=lambda: np.array([]))
+    x: np.ndarray = field(default_factory=lambda: np.array([]))
+    visual: Optional[MultiChannelLine] = None
     traces: Sequence[TraceVisuals] = tuple()
     ch_tree: Sequence[bool] = tuple()
     channels: int = 0
     fs: Optional[float] = None
+    node: Optional[scene.Node] = None
+    # Ring buffer slot that the next sample will be written to (ROLL mode).
+    head: int = 0
+    # Set when the ring buffer was written to while updates were paused.
+    stale: bool = False
+    # Number of samples written to the buffer.
+    count: int = 0
+    # Sum of every channel over the buffer, for AC coupling.
+    running_sum: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    # Min/max envelope drawn instead of the samples when zoomed out.
+    lod: Optional[MinMaxRing] = None
 
 
 class MultiTraceMode(enum.Enum):
@@ -236,6 +315,7 @@ class MultiTraceWidget(BasePlotWidget):
         self,
         mode: MultiTraceMode = MultiTraceMode.SET,
         trace_colors: dict[str, list] = None,
+        lod: bool = False,
         *args,
         **kwargs,
     ):
@@ -244,6 +324,8 @@ class MultiTraceWidget(BasePlotWidget):
         super().__init__(*args, **kwargs)
 
         self.mode = mode
+        # Draw the min/max of every pixel column when zoomed out.
+        self.lod = lod
         # Setup the default trace_colors
         self.trace_colors = trace_colors
         self.trace_colors["default"] = [
@@ -258,6 +340,7 @@ class MultiTraceWidget(BasePlotWidget):
 
         self._configure_2d()
         self.view.camera = RangedPanZoomCamera(vertical_zoom=True, vert_pan=False)
+        self.view.camera.transform.changed.connect(self.on_view_change)
         # the left mouse button pan has to be disabled in the camera, as it
         # interferes with dragging line points
         if self.view.camera._viewbox is not None:
@@ -328,6 +411,9 @@ class MultiTraceWidget(BasePlotWidget):
         self.pb_overlay.clicked.connect(self.on_overlay)
 
         self.paused = False
+        # GPU upload accounting, in bytes.
+        self.frame_upload_bytes = 0
+        self.canvas.events.draw.connect(self.on_draw, position="last")
 
         control_widget = QtWidgets.QWidget()
         control_layout = QtWidgets.QVBoxLayout()
@@ -350,6 +436,90 @@ class MultiTraceWidget(BasePlotWidget):
             self.pb_pause_updates.setText("Resume")
             self.paused = True
 
+    def on_draw(self, event):
+        self.frame_upload_bytes = sum(
+            traceinfo.visual.take_upload_bytes()
+            for traceinfo in self.trace_map.values()
+            if traceinfo.visual is not None
+        )
+        self.total_upload_bytes += self.frame_upload_bytes
+        logger.debug(f"Uploaded {self.frame_upload_bytes} bytes of vertex data")
+
+    def on_view_change(self, event):
+        if self.mode == MultiTraceMode.ROLL and self.paused is False:
+            for trace_info in self.trace_map.values():
+                self._update_lod(trace_info)
+
+    def _lod_spp(self, dt: float) -> int:
+        if self.lod is False:
+            return 1
+        return samples_per_pixel(self.view.camera.rect.width, self.view.size[0], dt)
+
+    def _update_lod(self, trace_info: TraceInfo, force: bool = False):
+        # Switch a ROLL mode trace between its samples and their envelope.
+        if trace_info.visual is None or trace_info.fs is None:
+            return
+        dt = 1 / trace_info.fs
+        spp = self._lod_spp(dt)
+        current = trace_info.lod.spp if trace_info.lod is not None else 1
+        if spp == current and force is False:
+            return
+
+        data = trace_info.data
+        num_slots = data.shape[0]
+        transform = trace_info.node.transform
+        if spp > 1:
+            window = num_slots - 1
+            count = min(trace_info.count, window)
+            lod = MinMaxRing(
+                window, trace_info.channels, dt, spp, count=trace_info.count - count
+            )
+            if count > 0:
+                # Samples of the ring buffer, oldest first.
+                head = trace_info.head
+                ordered = np.concatenate((data[head:], data[:head]))
+                lod.append(ordered[-count:])
+            trace_info.lod = lod
+            trace_info.visual.set_data(x=lod.x, y=lod.y)
+            transform.period = lod.period
+            transform.dt = lod.dt
+            transform.head = lod.x[lod.head]
+        else:
+            trace_info.lod = None
+            trace_info.visual.set_data(x=trace_info.x, y=data)
+            transform.period = num_slots * dt
+            transform.dt = dt
+            transform.head = trace_info.x[trace_info.head - 1]
+
+    def display_demand(self) -> dict:
+        """Part of the data shown by the plot, per trace.
+
+        Adds the channels whose lane is in view and enabled, and the
+        samples per pixel at the sampling rate of each trace.
+        """
+        demand = super().display_demand()
+        num_channels = sum(trace.channels for trace in self.trace_map.values())
+        if not demand or num_channels == 0:
+            return demand
+        rect = self.view.camera.rect
+        # Channels are drawn in lanes centered on their marker.
+        half_lane = self.WINDOW_HEIGHT / num_channels / 2
+        bottom = min(rect.bottom, rect.top) - half_lane
+        top = max(rect.bottom, rect.top) + half_lane
+        channels = {}
+        spp = {}
+        for trace_name, trace_info in self.trace_map.items():
+            channels[trace_name] = tuple(
+                trace.line.index
+                for trace in trace_info.traces
+                if trace.visible and bottom <= trace.marker.center <= top
+            )
+            if trace_info.fs is not None and demand["resolution"] is not None:
+                spp[trace_name] = demand["resolution"] * trace_info.fs
+        demand["channels"] = channels
+        demand["samples_per_pixel"] = spp
+        return demand
+
     def on_channelize(self):
         num_channels = sum([trace.channels for trace in self.trace_map.values()])
         spacing = self.WINDOW_HEIGHT / num_channels
@@ -359,12 +529,14 @@ class MultiTraceWidget(BasePlotWidget):
                 trace.marker.autoscale(spacing)
                 trace.marker.center = (trace_count + 0.5) * spacing
                 trace_count += 1
+        self.request_display_demand()
 
     def on_overlay(self):
         for traceinfo in self.trace_map.values():
             for trace in traceinfo.traces[::-1]:
                 trace.marker.autoscale(self.WINDOW_HEIGHT)
                 trace.marker.center = self.WINDOW_HEIGHT / 2
+        self.request_display_demand()
 
     def on_mouse_press(self, event):
         self.view.interactive = False
@@ -429,27 +601,54 @@ class MultiTraceWidget(BasePlotWidget):
             trace_info = self.update_trace(message)
 
         if isinstance(trace_info, TraceInfo):
-            num_data_pts = new_data.shape[0]
             # Get the current vertex buffer of the plot.
             data = trace_info.data
+            num_slots = data.shape[0]
+            num_data_pts = new_data.shape[0]
             # Make sure the number of new data pts does not exceed window length
-            if num_data_pts > data.shape[1]:
+            if num_data_pts >= num_slots:
                 logger.warn("Number of data points exceeds length of window!")
                 logger.warn(f"Number of data points: {num_data_pts}")
-                logger.warn(f"Length of window: {data.shape[1]}")
-            # Flip the data
-            new_data = new_data.T
-            new_data = np.flip(new_data, axis=1)
-            data[:, num_data_pts:, 1] = data[:, :-num_data_pts, 1]
-            data[:, :num_data_pts, 1] = new_data
-            if self.paused is False:
-                for idx, visuals in enumerate(trace_info.traces):
-                    if visuals.coupling is not None and visuals.coupling is Coupling.AC:
-                        demean_data = data[idx].copy()
-                        demean_data[:, 1] -= np.mean(demean_data[:, 1])
-                        visuals.line.set_data(pos=demean_data)
-                    else:
-                        visuals.line.set_data(pos=data[idx])
+                logger.warn(f"Length of window: {num_slots - 1}")
+                new_data = new_data[-(num_slots - 1) :]
+                num_data_pts = new_data.shape[0]
+            # Write the new samples at the head of the ring buffer,
+            # wrapping around to the start of the buffer if needed.
+            head = trace_info.head
+            first = min(num_data_pts, num_slots - head)
+            wrapped = slice(0, num_data_pts - first)
+            # Samples leave the running sum as they are overwritten.
+            running_sum = trace_info.running_sum
+            running_sum -= data[head : head + first].sum(axis=0, dtype=np.float64)
+            running_sum -= data[wrapped].sum(axis=0, dtype=np.float64)
+            data[head : head + first] = new_data[:first]
+            data[wrapped] = new_data[first:]
+            trace_info.head = (head + num_data_pts) % num_slots
+            trace_info.count += num_data_pts
+            if trace_info.head <= head:
+                # Once per window, start over to avoid accumulating errors.
+                running_sum[:] = data.sum(axis=0, dtype=np.float64)
+            else:
+                running_sum += data[head : head + first].sum(axis=0, dtype=np.float64)
+            if self.paused is True:
+                trace_info.stale = True
+            else:
+                self._update_coupling(trace_info)
+                if trace_info.stale:
+                    self._update_lod(trace_info, force=True)
+                elif trace_info.lod is not None:
+                    # Only the columns touched by the new samples change.
+                    lod = trace_info.lod
+                    for start, stop in lod.append(new_data):
+                        trace_info.visual.update_span(start, stop)
+                    trace_info.node.transform.head = lod.x[lod.head]
+                else:
+                    # The visual rolls the ring buffer so the newest sample is at 0.
+                    trace_info.node.transform.head = trace_info.x[trace_info.head - 1]
+                    # Only upload the slots written by this update.
+                    trace_info.visual.update_span(head, head + first)
+                    trace_info.visual.update_span(0, num_data_pts - first)
+                trace_info.stale = False
 
     def set_data(self, message: MultiTraceData):
         new_data = message.data
@@ -460,7 +659,7 @@ class MultiTraceWidget(BasePlotWidget):
         if (
             trace_info is None
             or new_data.shape[1] != trace_info.channels
-            or new_data.shape[0] != trace_info.data.shape[1]
+            or new_data.shape[0] != trace_info.data.shape[0]
             or fs != trace_info.fs
         ):
             trace_info = self.update_trace(message)
@@ -477,17 +676,37 @@ class MultiTraceWidget(BasePlotWidget):
                 f"x_arr shape = {x_arr.shape}, data shape = {new_data.shape}"
             )
         else:
-            data = trace_info.data
-            data[:, :, 0] = x_arr
-            data[:, :, 1] = new_data.T
+            trace_info.data[:] = new_data
+            trace_info.count += new_data.shape[0]
+            trace_info.running_sum[:] = new_data.sum(axis=0, dtype=np.float64)
             if self.paused is False:
-                for idx, visuals in enumerate(trace_info.traces):
-                    if visuals.coupling is not None and visuals.coupling is Coupling.AC:
-                        demean_data = data[idx].copy()
-                        demean_data[:, 1] -= np.mean(demean_data[:, 1])
-                        visuals.line.set_data(pos=demean_data)
-                    else:
-                        visuals.line.set_data(pos=data[idx])
+                x_changed = not np.array_equal(trace_info.x, x_arr)
+                if x_changed:
+                    trace_info.x[:] = x_arr
+                self._update_coupling(trace_info)
+                num_pts = x_arr.shape[0]
+                dt = (x_arr[-1] - x_arr[0]) / max(num_pts - 1, 1)
+                spp = self._lod_spp(dt)
+                if spp > 1:
+                    # Draw the min/max envelope of every pixel column.
+                    starts = np.arange(0, num_pts, spp)
+                    x = np.empty(2 * len(starts), np.float32)
+                    x[0::2] = x_arr[starts]
+                    x[1::2] = x_arr[np.minimum(starts + spp // 2, num_pts - 1)]
+                    y = minmax_envelope(trace_info.data, spp)
+                    trace_info.visual.set_data(x=x, y=y)
+                elif x_changed or trace_info.visual.y is not trace_info.data:
+                    trace_info.visual.set_data(x=trace_info.x, y=trace_info.data)
+                else:
+                    trace_info.visual.update_span(0, num_pts)
+
+    def _update_coupling(self, trace_info: TraceInfo):
+        # AC coupled channels are drawn around their mean, which the visual
+        # subtracts at render time.
+        ac = [visuals.coupling is Coupling.AC for visuals in trace_info.traces]
+        num_pts = max(min(trace_info.count, trace_info.data.shape[0]), 1)
+        mean = np.where(ac, trace_info.running_sum / num_pts, 0.0)
+        trace_info.visual.set_mean(mean)
 
     def update_trace(self, message: MultiTraceData) -> TraceInfo:
         data = message.data
@@ -510,11 +729,11 @@ class MultiTraceWidget(BasePlotWidget):
             widget.setParent(None)
         if trace_name in self.trace_map:
             for visuals in self.trace_map[trace_name].traces:
-                visuals.line.parent = None
-                if visuals.line.color is not None:
-                    self.trace_colors["inuse"].remove(visuals.line.color.hex)
+                self.trace_colors["inuse"].remove(visuals.line.color.hex)
                 visuals.marker.parent = None
+            self.trace_map[trace_name].node.parent = None
 
+        node = scene.Node(parent=self.view.scene)
         if self.mode == MultiTraceMode.ROLL:
             if fs is None:
                 raise ValueError("Must specify fs if in ROLL mode.")
@@ -529,15 +748,15 @@ class MultiTraceWidget(BasePlotWidget):
 
             ch_buf_len = int(self.WINDOW_WIDTH * fs)
             dt = 1 / fs
+            # The ring buffer holds one extra slot, which separates the newest
+            # sample from the oldest one and is never displayed.
+            num_slots = ch_buf_len + 1
 
-            # Setup the initial position buffer.
-            pos = np.zeros(
-                (channels, ch_buf_len, 2),
-                np.float32,
-            )
-            pos[:, :, 0] = np.arange(start=0, stop=self.WINDOW_WIDTH, step=dt)[
-                :ch_buf_len
-            ]
+            # Setup the initial sample buffer.
+            x = (np.arange(num_slots) * dt).astype(np.float32)
+            y = np.zeros((num_slots, channels), np.float32)
+            connect = "ring"
+            node.transform = RollTransform(period=num_slots * dt, dt=dt, head=x[-1])
 
         elif self.mode == MultiTraceMode.SET:
             if x_arr is None:
@@ -553,12 +772,10 @@ class MultiTraceWidget(BasePlotWidget):
             self.view.camera.limits = rect
             self.view.camera.rect = rect
 
-            # Setup the initial position buffer.
-            pos = np.zeros(
-                (channels, x_arr.shape[0], 2),
-                np.float32,
-            )
-            pos[:, :, 0] = x_arr
+            # Setup the initial sample buffer.
+            x = x_arr.astype(np.float32)
+            y = np.zeros((x_arr.shape[0], channels), np.float32)
+            connect = "strip"
         else:
             logger.error("Multitrace mode not valid!")
             raise Exception
@@ -570,6 +787,8 @@ class MultiTraceWidget(BasePlotWidget):
             colors = [color for color in colors if color in diff]
         else:
             colors = self.trace_colors["default"]
+        # All channels are drawn by a single visual.
+        visual = MultiChannelLine(x=x, y=y, connect=connect, parent=node)
         # Add the line and marker visuals to the scene
         channel_container = QtWidgets.QGroupBox(trace_name)
         layout = QtWidgets.QVBoxLayout()
@@ -577,17 +796,15 @@ class MultiTraceWidget(BasePlotWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         traces = []
         for ch in range(channels):
-            if ch >= len(colors):
-                ch = ch % len(colors)
-            c = color.Color(colors[ch])
+            c = color.Color(colors[ch % len(colors)])
             self.trace_colors["inuse"].append(c.hex)
             if ch_names is None:
                 name = f"Channel {ch}"
             else:
                 name = ch_names[ch]
             channel_widget = ChannelWidget(color=c.hex, name=name, units=units)
-            line = scene.Line(pos[ch], color=c, parent=self.view.scene)  # type: ignore
-            line.transform = scene.STTransform()
+            line = ChannelLine(visual, ch)
+            line.color = c
             marker = EditPolygon(
                 self.LX,
                 self.CY,
@@ -609,6 +826,9 @@ class MultiTraceWidget(BasePlotWidget):
             layout.addWidget(channel_widget)
             marker.autoscale()
             channel_widget.checkbox_enabled.stateChanged.connect(visuals.set_visible)
+            channel_widget.checkbox_enabled.stateChanged.connect(
+                self.request_display_demand
+            )
             channel_widget.cb_coupling.currentTextChanged.connect(visuals.set_coupling)
         channel_container.setLayout(layout)
         self.channel_controls[trace_name] = channel_container
@@ -618,11 +838,18 @@ class MultiTraceWidget(BasePlotWidget):
         self.channel_scroll_area.setWidget(self.channel_scroll_w)
 
         trace_info = TraceInfo(
-            data=pos,
+            data=y,
+            x=x,
+            running_sum=np.zeros(channels),
+            visual=visual,
             traces=traces,
             ch_tree=[True] * channels,
             channels=channels,
             fs=fs,
+            node=node,
         )
         self.trace_map[trace_name] = trace_info
+        self.request_display_demand()
+        if self.mode == MultiTraceMode.ROLL:
+            self._update_lod(trace_info)
         return trace_info
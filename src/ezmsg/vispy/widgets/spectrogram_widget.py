@@ -3,78 +3,81 @@ from typing import Union
 
 import numpy as np
 
-from vispy import scene
+from vispy.visuals.transforms import STTransform
 
-from ..helpers.ranged_pan_zoom import RangedPanZoomCamera
-from .plot_widget import BasePlotWidget
+from ..helpers.stft import StreamingSTFT
+from .image_widget import ImageWidget
 
 
-class SpectrogramWidget(BasePlotWidget):
+class SpectrogramWidget(ImageWidget):
     """
-    Calculate and show a spectrogram
+    Calculate and show a scrolling spectrogram of a stream
+
+    Each update computes only the frames completed by the new samples, and
+    appends them as columns of a waterfall image. The x axis is in seconds
+    of history, the y axis in Hz. Channels are stacked, channel ``k``
+    spanning ``k * fs / 2`` to ``(k + 1) * fs / 2``.
 
     Parameters
     ----------
-    x : array-like
-        1D signal to operate on. ``If len(x) < n_fft``, x will be
-        zero-padded to length ``n_fft``.
     n_fft : int
         Number of FFT points. Much faster for powers of two.
     step : int | None
         Step size between calculations. If None, ``n_fft // 2``
         will be used.
-    fs : float
-        The sample rate of the data.
+    fs : float | None
+        The sample rate of the data. Shown in samples if None, until set.
     window : str | None
         Window function to use. Can be ``'hann'`` for Hann window, or None
         for no windowing.
     normalize : bool
-        Normalization of spectrogram values across frequencies.
+        Normalization of every frame across frequencies.
     color_scale : {'linear', 'log'}
         Scale to apply to the result of the STFT.
-        ``'log'`` will use ``10 * log10(power)``.
+        ``'log'`` will use ``20 * log10(magnitude)``.
+    history : int
+        Number of frames shown.
     cmap : str
         Colormap name.
     clim : str | tuple
         Colormap limits. Should be ``'auto'`` or a two-element tuple of
         min and max values.
-    *args : list
-        Positional arguments to pass to `BasePlotWidget`.
     **kwargs : dict
-        Keyword arguments to pass to `BasePlotWidget`.
+        Keyword arguments to pass to `ImageWidget`.
     """
 
     def __init__(
         self,
-        x=None,
         n_fft=256,
         step=None,
         fs=1.0,
         window="hann",
         normalize=False,
         color_scale="log",
+        history=512,
         cmap="cubehelix",
         clim="auto",
-        *args,
         **kwargs,
     ):
-        super().__init__(*args, **kwargs)
+        super().__init__(cmap=cmap, clim=clim, waterfall=history, **kwargs)
+        self.view.camera.aspect = None
+        self._stft = StreamingSTFT(n_fft, step, window, normalize, color_scale)
+        self.fs = fs if fs is not None else 1.0
+
+    @property
+    def fs(self) -> float:
+        return self._fs
 
-        self._configure_2d()
-        self.view.camera = RangedPanZoomCamera(aspect=1)
-        self._spec = scene.Spectrogram(
-            x,
-            n_fft,
-            step,
-            fs,
-            window,
-            normalize,
-            color_scale,
-            cmap,
-            clim,
-            parent=self.view.scene,  # type: ignore
+    @fs.setter
+    def fs(self, fs: float):
+        self._fs = fs
+        self._stft.reset()
+        # Columns are frames, rows are frequency bins.
+        self.visual.transform = STTransform(
+            scale=(self._stft.step / fs, fs / self._stft.n_fft)
         )
-        self.link_views()
+        if self.visual.size != (1, 1):
+            self._fit_view(self.visual.size)
 
     def update(
         self,
@@ -88,22 +91,17 @@ class SpectrogramWidget(BasePlotWidget):
         Parameters
         ----------
         data: np.ndarray
-            1D signal to operate on. ``If len(x) < n_fft``, data will be
-            zero-padded to length ``n_fft``.
+            New samples, of shape (time,) or (time, channels).
         cmap : str
             Colormap name.
         clim : str | tuple
             Colormap limits. Should be ``'auto'`` or a two-element tuple of
             min and max values.
         """
-        if isinstance(data, np.ndarray):
-            self._spec.x = data
-        if isinstance(clim, tuple):
-            self._spec.clim = clim
-            self._clim_auto = False
-        elif isinstance(clim, str) and clim == "auto":
-            self._clim_auto = True
-        if isinstance(cmap, str):
-            self._spec.cmap = cmap
-        if self._clim_auto is True:
-            self._spec.clim = "auto"
+        columns = None
+        if data is not None:
+            frames = self._stft.process(data)
+            if frames.shape[0] > 0:
+                # (channels * n_freqs, frames), channel after channel.
+                columns = frames.reshape(frames.shape[0], -1).T
+        super().update(data=columns, clim=clim, cmap=cmap)
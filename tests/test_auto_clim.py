@@ -0,0 +1,33 @@
+import numpy as np
+
+from ezmsg.vispy.helpers.auto_clim import AutoClim
+
+
+def test_stuck_hot_pixel_does_not_stretch_limits():
+    rng = np.random.default_rng(0)
+    auto_clim = AutoClim()
+    for index in range(20):
+        frame = rng.normal(100, 10, (2160, 3840)).astype(np.float32)
+        # Always in the subsample.
+        frame[0, 0] = 1e7 if index % 2 else -1e7
+        auto_clim.update(frame)
+    low, high = auto_clim.limits
+    assert 70 < low < 85 and 115 < high < 130
+
+    for _ in range(40):
+        frame = rng.normal(1000, 10, (2160, 3840)).astype(np.float32)
+        frame[0, 0] = 1e7
+        auto_clim.update(frame)
+    low, high = auto_clim.limits
+    assert 970 < low < 985 and 1015 < high < 1030
+
+
+def test_random_hot_pixels_do_not_stretch_limits():
+    rng = np.random.default_rng(1)
+    auto_clim = AutoClim()
+    for _ in range(50):
+        frame = rng.normal(100, 10, (480, 640))
+        frame.flat[rng.integers(0, frame.size, 5)] = 1e6
+        auto_clim.update(frame)
+    low, high = auto_clim.limits
+    assert 70 < low < 85 and 115 < high < 130
@@ -0,0 +1,90 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from ezmsg.util.messages.axisarray import AxisArray
+from ezmsg.vispy.helpers.decimation import LTTBDecimator
+from ezmsg.vispy.helpers.decimation import MinMaxDecimator
+from ezmsg.vispy.units.decimate import Decimate
+from ezmsg.vispy.units.decimate import DecimateSettings
+
+
+def random_splits(length: int, rng: np.random.Generator) -> list[int]:
+    """Boundaries of random chunks covering ``length`` samples, some empty."""
+    cuts = np.sort(rng.integers(0, length, 40))
+    return [0, *cuts.tolist(), length]
+
+
+@pytest.mark.parametrize("decimator_type", [MinMaxDecimator, LTTBDecimator])
+def test_decimator_does_not_depend_on_splits(decimator_type):
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(5003, 3)).cumsum(axis=0)
+    whole = decimator_type(16).process(data)
+
+    decimator = decimator_type(16)
+    bounds = random_splits(len(data), rng)
+    chunks = [
+        decimator.process(data[start:stop])
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+
+    np.testing.assert_array_equal(np.concatenate(chunks), whole)
+
+
+def test_lttb_matches_reference():
+    rng = np.random.default_rng(1)
+    data = rng.normal(size=(400, 1))
+    n = 10
+    out = LTTBDecimator(n).process(data)[:, 0]
+
+    y = data[:, 0]
+    last_x, last_y = 0, y[0]
+    expected = []
+    for b in range(len(y) // n - 1):
+        xs = np.arange(b * n, (b + 1) * n)
+        next_x = (b + 1) * n + (n - 1) / 2
+        next_y = y[(b + 1) * n : (b + 2) * n].mean()
+        area = np.abs(
+            (last_x - next_x) * (y[xs] - last_y) - (last_x - xs) * (next_y - last_y)
+        )
+        pick = xs[area.argmax()]
+        expected.append(y[pick])
+        last_x, last_y = pick, y[pick]
+
+    np.testing.assert_array_equal(out, expected)
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_decimate_unit_offsets_do_not_depend_on_splits(method):
+    rng = np.random.default_rng(2)
+    fs, t0 = 1000.0, 12.5
+    data = rng.normal(size=(4000, 2))
+
+    async def run(bounds):
+        unit = Decimate(DecimateSettings(points_per_second=100.0, method=method))
+        await unit.setup()
+        outputs = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            message = AxisArray(
+                data[start:stop],
+                dims=["time", "ch"],
+                axes={"time": AxisArray.Axis(gain=1 / fs, offset=t0 + start / fs)},
+            )
+            async for _, output in unit.on_signal(message):
+                outputs.append(output)
+        return outputs
+
+    (whole,) = asyncio.run(run([0, len(data)]))
+    chunks = asyncio.run(run(random_splits(len(data), rng)))
+
+    np.testing.assert_array_equal(
+        np.concatenate([chunk.data for chunk in chunks]), whole.data
+    )
+    gain = whole.axes["time"].gain
+    assert whole.axes["time"].offset == pytest.approx(t0)
+    start = 0
+    for chunk in chunks:
+        assert chunk.axes["time"].gain == pytest.approx(gain)
+        assert chunk.axes["time"].offset == pytest.approx(t0 + start * gain)
+        start += chunk.data.shape[0]
@@ -0,0 +1,56 @@
+import math
+
+from ezmsg.vispy.helpers.metrics import merge_remote_reports
+from ezmsg.vispy.helpers.metrics import PlotMetrics
+
+
+def _report(**values) -> dict:
+    report = PlotMetrics(timestamps=False).report(0, 0)
+    report.update(values)
+    return report
+
+
+def test_merge_remote_reports():
+    local = _report(period=1.0, messages=100, dropped=3)
+    remote = [
+        _report(
+            period=0.5,
+            messages=50,
+            samples=500,
+            dropped=1,
+            updates=10,
+            update_time=0.002,
+            max_update_time=0.004,
+            upload_bytes=1000,
+            fps=20.0,
+            latency_p99=0.03,
+            staging_high_water=40,
+        ),
+        _report(
+            period=0.5,
+            messages=47,
+            samples=470,
+            updates=30,
+            update_time=0.001,
+            max_update_time=0.002,
+            upload_bytes=2000,
+            fps=60.0,
+            staging_high_water=80,
+        ),
+    ]
+    values = merge_remote_reports(local, remote)
+
+    assert values["period"] == 1.0
+    # Messages reaching the proxy, drops on both sides.
+    assert values["messages"] == 100
+    assert values["dropped"] == 4
+    assert values["samples"] == 970
+    assert values["updates"] == 40
+    assert math.isclose(values["update_time"], (10 * 0.002 + 30 * 0.001) / 40)
+    assert values["max_update_time"] == 0.004
+    assert values["upload_bytes"] == 3000
+    assert values["fps"] == 40.0
+    assert values["latency_p99"] == 0.03
+    assert math.isnan(values["latency_p50"])
+    assert values["staging_high_water"] == 80
+    assert merge_remote_reports(local, []) == local
@@ -0,0 +1,27 @@
+import numpy as np
+
+from ezmsg.vispy.helpers.decimation import minmax_envelope
+from ezmsg.vispy.helpers.decimation import MinMaxRing
+
+
+def test_minmax_ring_matches_envelope_across_wraps():
+    rng = np.random.default_rng(3)
+    spp, window = 8, 100
+    data = rng.normal(size=(1500, 2)).astype(np.float32)
+    ring = MinMaxRing(window, 2, dt=1.0, spp=spp)
+    # Random chunks, most of them ending inside a column.
+    bounds = np.unique([0, *rng.integers(0, len(data), 120), len(data)])
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        spans = ring.append(data[start:stop])
+        for span_start, span_stop in spans:
+            assert 0 <= span_start < span_stop <= len(ring.x)
+
+    envelope = minmax_envelope(data, spp)
+    last = len(envelope) // 2 - 1
+    assert last >= 3 * ring.columns
+    for column in range(last - ring.columns + 1, last + 1):
+        slot = 2 * (column % ring.columns)
+        np.testing.assert_array_equal(
+            ring.y[slot : slot + 2], envelope[2 * column : 2 * column + 2]
+        )
+    assert ring.head == 2 * (last % ring.columns) + 1
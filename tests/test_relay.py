@@ -0,0 +1,127 @@
+import asyncio
+import socket
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+from ezmsg.vispy.frontends.codecs import register_codec
+from ezmsg.vispy.frontends.codecs import type_codec_id
+from ezmsg.vispy.frontends.relay import BUFFER_ALIGNMENT
+from ezmsg.vispy.frontends.relay import decode_frame
+from ezmsg.vispy.frontends.relay import encode_frame
+from ezmsg.vispy.frontends.relay import FrameDecoder
+from ezmsg.vispy.frontends.relay import FrameStreamReader
+from ezmsg.vispy.frontends.relay import FrameWriter
+from ezmsg.vispy.frontends.relay import READ_SIZE
+from ezmsg.vispy.helpers.constants import BYTEORDER
+from ezmsg.vispy.helpers.constants import UINT64_SIZE
+
+
+@register_codec
+@dataclass
+class _Sample:
+    name: str
+    gain: float
+    data: np.ndarray
+
+
+def _messages():
+    rng = np.random.default_rng(0)
+    messages = [
+        {"small": 1},
+        np.arange(3, dtype=np.uint8),
+        # Larger than READ_SIZE, read at once by FrameStreamReader.
+        rng.normal(size=(READ_SIZE // 8 + 1000, 3)),
+        _Sample("trace", 2.5, rng.normal(size=(7, 5)).astype(np.float32)),
+        {"arrays": [np.zeros(0), rng.integers(0, 100, 1001, dtype=np.int16)]},
+    ]
+    return messages * 3
+
+
+def _assert_equal(received, expected):
+    assert len(received) == len(expected)
+    for got, msg in zip(received, expected):
+        assert type(got) is type(msg)
+        if isinstance(msg, np.ndarray):
+            np.testing.assert_array_equal(got, msg)
+        elif isinstance(msg, _Sample):
+            assert (got.name, got.gain) == (msg.name, msg.gain)
+            np.testing.assert_array_equal(got.data, msg.data)
+        elif "arrays" in msg:
+            for a, b in zip(got["arrays"], msg["arrays"]):
+                np.testing.assert_array_equal(a, b)
+        else:
+            assert got == msg
+
+
+def _frame_bytes(msg) -> bytes:
+    return b"".join(bytes(memoryview(buffer).cast("B")) for buffer in encode_frame(msg))
+
+
+def test_frame_layout_and_codec_id():
+    data = np.arange(100, dtype=np.float64)
+    frame = _frame_bytes(_Sample("x", 1.0, data))
+    payload = bytearray(frame[UINT64_SIZE:])
+    size = int.from_bytes(frame[:UINT64_SIZE], byteorder=BYTEORDER)
+    assert size == len(payload)
+    codec_id = int.from_bytes(payload[:UINT64_SIZE], byteorder=BYTEORDER)
+    assert codec_id == type_codec_id(_Sample)
+
+    decoded = decode_frame(payload)
+    np.testing.assert_array_equal(decoded.data, data)
+    # Arrays are rebuilt over the payload, on an aligned offset.
+    base = np.frombuffer(payload, np.uint8).ctypes.data
+    assert (decoded.data.ctypes.data - base) % BUFFER_ALIGNMENT == 0
+    assert decoded.data.flags.writeable
+
+
+@pytest.mark.parametrize("chunk", [1, 5, UINT64_SIZE + 3, 4096])
+def test_decoder_reassembles_split_frames(chunk):
+    messages = _messages()
+    stream = b"".join(_frame_bytes(msg) for msg in messages)
+    writer, reader = socket.socketpair()
+    reader.setblocking(False)
+    decoder = FrameDecoder()
+    frames = []
+    try:
+        for start in range(0, len(stream), chunk):
+            writer.sendall(stream[start : start + chunk])
+            # Small budgets end reads in the middle of headers and payloads.
+            frames += decoder.read_from(reader, budget=chunk)
+        while len(frames) < len(messages):
+            frames += decoder.read_from(reader)
+        writer.close()
+        frames += decoder.read_from(reader)
+    finally:
+        reader.close()
+    assert decoder.closed
+    _assert_equal([decode_frame(frame) for frame in frames], messages)
+
+
+def test_writer_and_stream_reader_round_trip():
+    messages = _messages()
+
+    async def run():
+        writer_sock, reader_sock = socket.socketpair()
+        # A small buffer forces partial writes.
+        writer_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        reader, _ = await asyncio.open_connection(sock=reader_sock)
+        writer = FrameWriter(writer_sock, asyncio.get_running_loop())
+        for msg in messages:
+            writer.send(msg)
+        frames = []
+        stream = FrameStreamReader(reader)
+        while len(frames) < len(messages):
+            frames += await stream.read_batch()
+        assert writer.queue_depth == 0
+        report = writer.report()
+        writer_sock.close()
+        assert await stream.read_batch() == []
+        return frames, report
+
+    frames, report = asyncio.run(asyncio.wait_for(run(), 10))
+    _assert_equal([decode_frame(frame) for frame in frames], messages)
+    assert report["messages"] == len(messages)
+    assert report["bytes"] == sum(len(_frame_bytes(msg)) for msg in messages)
+    assert report["writes"] > 1
@@ -0,0 +1,44 @@
+import numpy as np
+
+from ezmsg.vispy.helpers.shared_ring import SharedFrameRing
+
+
+def test_ring_wraps_drops_and_keeps_order():
+    rng = np.random.default_rng(0)
+    producer = SharedFrameRing(8192)
+    consumer = SharedFrameRing(name=producer.name)
+    try:
+        written = []
+        dropped = 0
+        received = []
+        index = 0
+        for _ in range(200):
+            # More frames than fit between two reads.
+            for _ in range(rng.integers(1, 12)):
+                msg = {"index": index, "data": np.full(rng.integers(1, 200), index)}
+                if producer.write(msg):
+                    written.append(index)
+                else:
+                    dropped += 1
+                index += 1
+            messages = consumer.read()
+            if rng.random() < 0.3:
+                # Until released, the frames read keep their space, and new
+                # frames fill the rest of the ring until one is dropped.
+                while producer.write({"index": -1, "data": np.full(100, -1)}):
+                    pass
+                dropped += 1
+                messages += consumer.read()
+            consumer.release()
+            for msg in messages:
+                assert np.all(msg["data"] == msg["index"])
+            received += [msg["index"] for msg in messages if msg["index"] >= 0]
+
+        assert received == written
+        assert producer.dropped == consumer.dropped == dropped > 0
+        # The bytes written went around the ring many times.
+        assert int(producer._counters[0]) > 20 * producer.capacity
+        assert producer.used == 0
+    finally:
+        consumer.close()
+        producer.close()
@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from ezmsg.vispy.helpers.stft import StreamingSTFT
+
+
+@pytest.mark.parametrize("n_fft, step", [(64, 32), (64, 64), (64, 100)])
+def test_chunked_matches_batch(n_fft, step):
+    x = np.random.default_rng(0).normal(size=(5000, 2))
+    batch = StreamingSTFT(n_fft, step).process(x)
+
+    stft = StreamingSTFT(n_fft, step)
+    chunks = [stft.process(x[start : start + 70]) for start in range(0, len(x), 70)]
+    chunked = np.concatenate(chunks)
+
+    assert batch.shape[0] == (len(x) - n_fft) // step + 1
+    np.testing.assert_allclose(chunked, batch, rtol=1e-5, atol=1e-5)
@@ -0,0 +1,27 @@
+import numpy as np
+
+from ezmsg.vispy.helpers.streaming_line import MultiChannelLineVisual
+
+
+def test_buffers_hold_one_float_per_sample():
+    num_slots, channels = 1000, 64
+    x = np.arange(num_slots, dtype=np.float32)
+    y = np.random.default_rng(0).normal(size=(num_slots, channels))
+    visual = MultiChannelLineVisual(x=x, y=y.astype(np.float32), connect="ring")
+    visual._upload()
+
+    # y as is, x shared by all channels, no index buffer.
+    assert visual._y_vbo.nbytes == num_slots * channels * 4
+    assert visual._x_vbo.nbytes == num_slots * 4
+    params = visual._params.nbytes
+    assert visual.take_upload_bytes() == (num_slots * channels + num_slots) * 4 + params
+
+    # Each channel is drawn from a strided view of the rows.
+    view = visual._y_views[5]
+    assert (view.size, view.offset, view.stride) == (num_slots, 5 * 4, channels * 4)
+
+    visual.y[10:20] = 1.0
+    visual.update_span(10, 20)
+    visual.update_span(15, 30)
+    visual._upload()
+    assert visual.take_upload_bytes() == 20 * channels * 4
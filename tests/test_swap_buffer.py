@@ -0,0 +1,52 @@
+import threading
+
+from ezmsg.vispy.helpers.swap_buffer import SwapBuffer
+
+
+def merge_items(into: dict, newer: dict):
+    into.setdefault("items", []).extend(newer.pop("items", []))
+
+
+def test_threaded_producer_and_consumer():
+    count = 20000
+    swap = SwapBuffer(merge=merge_items)
+    done = threading.Event()
+    received = []
+    acquired = []
+    errors = []
+
+    def produce():
+        for index in range(count):
+            swap.back.setdefault("items", []).append(index)
+            swap.publish()
+        done.set()
+
+    def consume():
+        while True:
+            finished = done.is_set()
+            buffer = swap.acquire()
+            if buffer is None:
+                if finished:
+                    return
+                continue
+            # The producer must not fill a buffer taken here.
+            if buffer is swap.back:
+                errors.append("buffer handed out twice")
+            acquired.append(id(buffer))
+            received.extend(buffer.get("items", []))
+            swap.release(buffer)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    produce()
+    consumer.join(timeout=30)
+
+    assert not consumer.is_alive()
+    assert not errors
+    # Every item arrives once, in order, whether merged or not.
+    assert received == list(range(count))
+    # Each publish either handed over a buffer or merged into one.
+    assert len(acquired) + swap.producer_contention == count
+    assert swap.acquire() is None
+    # Three buffers cover the back, the published and the consumed one.
+    assert swap.allocations == 0